@@ -1,16 +1,19 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
-from models.diagnosis import DiagnosisModel
-from models.data_loader import DataLoader
-from models.image_analyzer import ImageAnalyzer
+from flask import Flask, Request, render_template, request, jsonify, session, redirect, url_for, flash, send_from_directory
+from models.diagnosis import DEFAULT_TOP_K, DEFAULT_MIN_SCORE
+from models import registry
+from models.image_io import upload_stream_factory, read_buffer
 from services.hospital_service import HospitalService
 from services.doctor_service import DoctorService
+from services.symptom_suggest_service import SymptomSuggestService
+from services.analysis_cache_service import AnalysisCacheService
+from services.job_service import JobService, JobQueueFull
 import os
 import json
+import hashlib
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 import openai
 import logging
-from models.chatbot_responses import MentalHealthChatbot
 from functools import wraps
 import threading
 
@@ -21,12 +24,38 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class UploadRequest(Request):
+    """Keep uploaded files in memory so the analyzers decode them without a disk round trip"""
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return upload_stream_factory(total_content_length, content_type, filename, content_length)
+
 app = Flask(__name__, 
     static_folder='static',
     template_folder='templates'
 )
+app.request_class = UploadRequest
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
+# Accepted upload types and size limit for /api/upload-scan and /api/upload-report
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+
+# Maximum number of symptom sets accepted by /api/diagnose/batch
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '1000'))
+
+# Upper bound for the top_k option of the diagnosis endpoints
+MAX_TOP_K = int(os.getenv('MAX_TOP_K', '50'))
+
+# How long clients may reuse /api/symptoms before revalidating its ETag
+SYMPTOMS_MAX_AGE = int(os.getenv('SYMPTOMS_MAX_AGE', '3600'))
+
+# Default and maximum number of results from /api/symptoms/suggest
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+# Seconds between keep-alive comments on /api/jobs/<id>/events, and the Retry-After sent with 429
+JOB_EVENTS_KEEPALIVE = 15
+JOB_RETRY_AFTER = 5
 
 # Global variables to track initialization status
 models_initialized = False
@@ -38,24 +67,50 @@ diagnosis_model = None
 hospital_service = None
 doctor_service = None
 image_analyzer = None
+scan_analyzer = None
 chatbot = None
+symptom_suggest_service = None
+
+# Serialized /api/symptoms response and its ETag, built once per dataset
+symptoms_payload = None
+symptoms_etag = None
+
+# Scan/report results keyed by upload content, scan type and model version
+analysis_cache = None
+
+# Background scan/report analysis; report OCR fans out to the OCR worker pool
+job_service = None
+
+def build_symptoms_payload(loader):
+    payload = json.dumps({"symptoms": sorted(loader.get_all_symptoms())}, separators=(',', ':')).encode('utf-8')
+    return payload, hashlib.sha256(payload).hexdigest()
 
 def init_services():
     global data_loader, diagnosis_model, hospital_service, doctor_service, image_analyzer, scan_analyzer, chatbot, models_initialized, initialization_error
+    global symptoms_payload, symptoms_etag, symptom_suggest_service
     try:
-        data_loader = DataLoader()
-        diagnosis_model = DiagnosisModel()
+        # Heavy objects are built once per process and shared through the registry
+        data_loader = registry.get_data_loader()
+        symptoms_payload, symptoms_etag = build_symptoms_payload(data_loader)
+        symptom_suggest_service = SymptomSuggestService(data_loader.get_all_symptoms())
+        diagnosis_model = registry.get_diagnosis_model()
         hospital_service = HospitalService()
         doctor_service = DoctorService()
-        image_analyzer = ImageAnalyzer()
-        chatbot = MentalHealthChatbot()
+        image_analyzer = registry.get_image_analyzer()
+        scan_analyzer = registry.get_scan_analyzer()
+        chatbot = registry.get_chatbot()
         models_initialized = True
     except Exception as e:
         initialization_error = str(e)
         logger.error(f"Error initializing services: {e}")
 
-# Start initialization in a separate thread
-threading.Thread(target=init_services).start()
+# Create the services and start initialization in a separate thread. OCR worker
+# processes re-import this module as __mp_main__ and must skip all of it, e.g.
+# so they never open the on-disk analysis cache.
+if __name__ != '__mp_main__':
+    analysis_cache = AnalysisCacheService()
+    job_service = JobService()
+    threading.Thread(target=init_services).start()
 
 def requires_initialization(f):
     @wraps(f)
@@ -87,99 +142,57 @@ def verify_user(username, password):
             return True
     return False
 
+def parse_ranking_options(data):
+    """Read and validate the optional top_k / min_score request fields"""
+    top_k = data.get('top_k', DEFAULT_TOP_K)
+    min_score = data.get('min_score', DEFAULT_MIN_SCORE)
+    if isinstance(top_k, bool) or not isinstance(top_k, int) or not 1 <= top_k <= MAX_TOP_K:
+        raise ValueError(f"top_k must be an integer between 1 and {MAX_TOP_K}")
+    if isinstance(min_score, bool) or not isinstance(min_score, (int, float)) or not 0 <= min_score <= 1:
+        raise ValueError("min_score must be a number between 0 and 1")
+    return top_k, float(min_score)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-# Dummy analysis logic for scan
-def analyze_scan(filename):
-    try:
-        # Enhanced scan analysis with disease-specific findings
-        analysis_result = {
-            "status": "completed",
-            "scan_type": "MRI",  # This would be determined from the file
-            "findings": {
-                "normal_structures": [
-                    "Normal brain tissue structure",
-                    "No signs of hemorrhage",
-                    "Ventricles appear normal in size"
-                ],
-                "abnormalities": [
-                    "Slight asymmetry in brain hemispheres",
-                    "Minor calcification in left frontal lobe"
-                ]
-            },
-            "disease_indicators": {
-                "potential_conditions": [
-                    "Early signs of neurological disorder",
-                    "Possible onset of degenerative condition"
-                ],
-                "severity": "mild",
-                "confidence_score": 0.85
-            },
-            "recommendations": [
-                "Immediate consultation with neurologist recommended",
-                "Follow-up scan in 3 months",
-                "Consider additional diagnostic tests"
-            ]
-        }
-        return analysis_result
-    except Exception as e:
-        return {"error": f"Analysis failed: {str(e)}"}
-
-# Dummy analysis logic for report
-def analyze_report(filename):
-    try:
-        with open(os.path.join(UPLOAD_FOLDER, filename), 'r', errors='ignore') as f:
-            content = f.read()
-        
-        # Enhanced report analysis with structured medical summary
-        report_summary = {
-            "patient_summary": {
-                "condition": "Stable with improvement",
-                "vital_signs": {
-                    "blood_pressure": "Slightly elevated",
-                    "heart_rate": "Normal",
-                    "temperature": "Normal"
-                }
-            },
-            "medical_history": [
-                "Previous diagnosis of condition X",
-                "Ongoing treatment for Y",
-                "History of Z"
-            ],
-            "current_status": {
-                "symptoms": [
-                    "Reduced pain levels",
-                    "Improved mobility",
-                    "Stable blood pressure"
-                ],
-                "medications": [
-                    "Medication A - dosage adjusted",
-                    "Medication B - continued as prescribed"
-                ]
-            },
-            "treatment_plan": {
-                "immediate_actions": [
-                    "Adjust medication dosage",
-                    "Schedule physical therapy",
-                    "Follow-up appointment in 2 weeks"
-                ],
-                "long_term_goals": [
-                    "Complete recovery within 6 months",
-                    "Maintain stable condition",
-                    "Prevent recurrence"
-                ]
-            },
-            "recommendations": [
-                "Continue current treatment plan",
-                "Regular monitoring of vital signs",
-                "Lifestyle modifications",
-                "Regular follow-up appointments"
-            ]
-        }
-        return report_summary
-    except Exception as e:
-        return {"error": f"Report analysis failed: {str(e)}"}
+def parse_upload(require_scan_type=False):
+    """Uploaded file and scan type from the form; raises ValueError for a 400 response"""
+    if 'file' not in request.files:
+        raise ValueError('No file uploaded')
+    file = request.files['file']
+    if file.filename == '':
+        raise ValueError('No file selected')
+    if not allowed_file(file.filename):
+        raise ValueError('Invalid file type')
+    scan_type = request.form.get('scan_type', '').lower()
+    if require_scan_type and not scan_type:
+        raise ValueError('Scan type not specified')
+    return file, scan_type
+
+def scan_cache_key(data, scan_type):
+    return analysis_cache.key(data, 'scan', scan_type, scan_analyzer.model_version(scan_type))
+
+def report_cache_key(data):
+    return analysis_cache.key(data, 'report', image_analyzer.report_version())
+
+def analysis_succeeded(result):
+    return result.get('success', False)
+
+def cached_json_response(payload, hit):
+    response = app.response_class(payload, mimetype='application/json')
+    response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+    return response
+
+def job_response(job):
+    body = job.to_dict()
+    body['status_url'] = url_for('get_job', job_id=job.id)
+    body['events_url'] = url_for('job_events', job_id=job.id)
+    return jsonify(body), 200 if job.done else 202
+
+def job_queue_full_response(error):
+    response = jsonify({'success': False, 'error': f"Analysis queue is full ({error}). Please retry shortly."})
+    response.headers['Retry-After'] = str(JOB_RETRY_AFTER)
+    return response, 429
 
 @app.route('/')
 @requires_initialization
@@ -245,8 +258,29 @@ def logout():
 @app.route('/api/symptoms', methods=['GET'])
 def get_symptoms():
     try:
-        symptoms = data_loader.get_all_symptoms()
-        return jsonify({"symptoms": sorted(list(symptoms))})
+        if symptoms_payload is None:
+            return jsonify({"error": "Symptoms are still loading. Please try again shortly."}), 503
+
+        response = app.response_class(symptoms_payload, mimetype='application/json')
+        response.set_etag(symptoms_etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = SYMPTOMS_MAX_AGE
+        # Answers with 304 Not Modified when If-None-Match matches the ETag
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/symptoms/suggest', methods=['GET'])
+def suggest_symptoms():
+    try:
+        query = request.args.get('q', '')
+        if not query.strip():
+            return jsonify({"error": "Query parameter q is required"}), 400
+
+        limit = request.args.get('limit', SUGGEST_DEFAULT_LIMIT, type=int)
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+        return jsonify({"suggestions": symptom_suggest_service.suggest(query, limit)})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -258,7 +292,12 @@ def diagnose():
         if not symptoms:
             return jsonify({"error": "Please provide at least one symptom"}), 400
 
-        diagnosis_result = diagnosis_model.predict(symptoms)
+        try:
+            top_k, min_score = parse_ranking_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        diagnosis_result = diagnosis_model.predict(symptoms, top_k, min_score)
 
         if "error" in diagnosis_result:
             return jsonify(diagnosis_result), 400
@@ -271,6 +310,34 @@ def diagnose():
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+@app.route('/api/diagnose/batch', methods=['POST'])
+def diagnose_batch():
+    try:
+        data = request.get_json()
+        symptom_sets = data.get('symptom_sets', [])
+        if not symptom_sets or not isinstance(symptom_sets, list):
+            return jsonify({"error": "Please provide a list of symptom sets"}), 400
+        if len(symptom_sets) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"A batch can contain at most {MAX_BATCH_SIZE} symptom sets"}), 400
+        if not all(isinstance(symptoms, list) for symptoms in symptom_sets):
+            return jsonify({"error": "Each symptom set must be a list of symptoms"}), 400
+
+        try:
+            top_k, min_score = parse_ranking_options(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        results = diagnosis_model.predict_batch(symptom_sets, top_k, min_score)
+
+        for diagnosis_result in results:
+            if diagnosis_result.get('predicted_disease'):
+                hospitals = hospital_service.get_nearby_hospitals(diagnosis_result['predicted_disease'])
+                diagnosis_result['hospitals'] = hospitals
+
+        return jsonify({"results": results})
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
 @app.route('/api/precautions', methods=['GET'])
 def get_precautions():
     try:
@@ -295,6 +362,136 @@ def get_doctors():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/upload-scan', methods=['POST'])
+def upload_scan():
+    try:
+        if scan_analyzer is None:
+            return jsonify({'success': False, 'error': 'Scan analysis is still loading. Please try again shortly.'}), 503
+
+        try:
+            file, scan_type = parse_upload(require_scan_type=True)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Decode straight from the in-memory upload; nothing is written to disk.
+        # Identical bytes analyzed by the same model are answered from the cache.
+        data = read_buffer(file.stream)
+        payload, hit = analysis_cache.lookup(
+            scan_cache_key(data, scan_type), lambda: scan_analyzer.analyze_scan(data, scan_type),
+            cacheable=analysis_succeeded
+        )
+        return cached_json_response(payload, hit)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/upload-report', methods=['POST'])
+def upload_report():
+    try:
+        if image_analyzer is None:
+            return jsonify({'success': False, 'error': 'Report analysis is still loading. Please try again shortly.'}), 503
+
+        try:
+            file, _ = parse_upload()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        # Decode straight from the in-memory upload; nothing is written to disk.
+        # Identical bytes analyzed by the same pipeline are answered from the cache.
+        data = read_buffer(file.stream)
+        payload, hit = analysis_cache.lookup(
+            report_cache_key(data), lambda: image_analyzer.analyze_report(data),
+            cacheable=analysis_succeeded
+        )
+        return cached_json_response(payload, hit)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/jobs/scan', methods=['POST'])
+def submit_scan_job():
+    try:
+        if scan_analyzer is None:
+            return jsonify({'success': False, 'error': 'Scan analysis is still loading. Please try again shortly.'}), 503
+
+        try:
+            file, scan_type = parse_upload(require_scan_type=True)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        key = scan_cache_key(read_buffer(file.stream), scan_type)
+        payload = analysis_cache.get(key)
+        if payload is not None:
+            return job_response(job_service.completed('scan', json.loads(payload)))
+
+        # The job outlives this request, so it gets its own copy of the upload
+        data = bytes(read_buffer(file.stream))
+        job = job_service.submit(
+            'scan', scan_analyzer.analyze_scan, data, scan_type,
+            on_result=lambda result: analysis_cache.store(key, result, analysis_succeeded)
+        )
+        return job_response(job)
+    except JobQueueFull as e:
+        return job_queue_full_response(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/jobs/report', methods=['POST'])
+def submit_report_job():
+    try:
+        if image_analyzer is None:
+            return jsonify({'success': False, 'error': 'Report analysis is still loading. Please try again shortly.'}), 503
+
+        try:
+            file, _ = parse_upload()
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+        key = report_cache_key(read_buffer(file.stream))
+        payload = analysis_cache.get(key)
+        if payload is not None:
+            return job_response(job_service.completed('report', json.loads(payload)))
+
+        # The job outlives this request, so it gets its own copy of the upload
+        data = bytes(read_buffer(file.stream))
+        job = job_service.submit(
+            'report', image_analyzer.analyze_report, data,
+            on_result=lambda result: analysis_cache.store(key, result, analysis_succeeded)
+        )
+        return job_response(job)
+    except JobQueueFull as e:
+        return job_queue_full_response(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = job_service.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+
+    def stream():
+        # One event per status change; the stream ends once the job is done
+        status = None
+        while True:
+            if job.status != status:
+                status = job.status
+                yield f"event: {status}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.done:
+                    return
+            elif job.wait(status, JOB_EVENTS_KEEPALIVE) == status:
+                yield ": keep-alive\n\n"
+
+    return app.response_class(stream(), mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     try:
@@ -0,0 +1,91 @@
+"""Time indicator feature extraction before and after it moved to once per image.
+
+    python benchmark_features.py [path/to/images] [--runs 200]
+
+ImageAnalyzer checks up to 11 indicators for an image with every condition
+detected. It used to call its old _extract_features once per check on the
+float model input (reproduced below as legacy_features). That input is a
+4-D batch, so cv2.cvtColor raised and no check ever saw any features.
+Three variants are timed per image:
+
+  before        legacy_features x11 on the model input, as it ran (each call fails)
+  before, fixed legacy_features x11 on a uint8 grayscale copy of that input,
+                i.e. what the per-indicator path costs once it works
+  after         image_features once on the decoded image (grayscale, resize,
+                histogram, mean/std, edges)
+
+Without an image directory random 1024x1024 images are used, which time the
+same work.
+"""
+import os
+import time
+import argparse
+import numpy as np
+import cv2
+from models.preprocessing import FEATURE_PIPELINE, SCAN_PIPELINE, image_features
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# Indicators of all four ImageAnalyzer conditions
+INDICATOR_CHECKS = 11
+
+def legacy_features(image):
+    """ImageAnalyzer._extract_features before the change, without its error print"""
+    try:
+        if len(image.shape) > 2:
+            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        else:
+            gray = image
+        return {
+            'histogram': cv2.calcHist([gray], [0], None, [256], [0, 256]),
+            'mean_intensity': np.mean(gray),
+            'std_intensity': np.std(gray),
+            'edges': cv2.Canny(gray, 100, 200)
+        }
+    except Exception:
+        return None
+
+def per_indicator(image):
+    return [legacy_features(image) for _ in range(INDICATOR_CHECKS)]
+
+def timed(fn, inputs, runs):
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='?', help='directory of scan images')
+    parser.add_argument('--runs', type=int, default=200, help='timed calls per variant')
+    parser.add_argument('--limit', type=int, default=50, help='maximum number of images')
+    args = parser.parse_args()
+
+    if args.images:
+        paths = sorted(
+            os.path.join(args.images, name) for name in os.listdir(args.images)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )[:args.limit]
+        images = [cv2.imread(path, cv2.IMREAD_COLOR) for path in paths]
+    else:
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 256, (1024, 1024, 3), dtype=np.uint8) for _ in range(8)]
+
+    model_inputs = [SCAN_PIPELINE(image) for image in images]
+    gray_inputs = [cv2.cvtColor(np.uint8(batch[0] * 255), cv2.COLOR_RGB2GRAY) for batch in model_inputs]
+    failed = sum(features is None for features in per_indicator(model_inputs[0]))
+
+    rows = [
+        ('before', timed(per_indicator, model_inputs, args.runs)),
+        ('before, fixed', timed(per_indicator, gray_inputs, args.runs)),
+        ('after', timed(image_features, images, args.runs)),
+    ]
+    print(f"{'':16}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, (p50, p95) in rows:
+        print(f"{name:16}{p50:10.3f}{p95:10.3f}")
+    print(f"'before' calls that returned no features: {failed} of {INDICATOR_CHECKS}")
+    print(f"feature pipeline stages (avg ms): {FEATURE_PIPELINE.stats()}")
+
+if __name__ == '__main__':
+    main()
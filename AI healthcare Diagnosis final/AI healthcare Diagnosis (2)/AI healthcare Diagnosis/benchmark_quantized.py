@@ -0,0 +1,95 @@
+"""Compare the float and int8 scan backbones: load time, memory, latency and agreement.
+
+    python benchmark_quantized.py [path/to/images] [--runs 50]
+
+Run export_quantized_models.py first. Agreement is measured on every
+analyzer head applied to float vs int8 features. Without an image directory
+the comparison uses random images, which only checks latency and memory
+meaningfully; agreement should be judged on real scans.
+"""
+import os
+import time
+import argparse
+import resource
+import numpy as np
+from models.image_analyzer import ImageAnalyzer
+from models.scan_analyzer import ScanAnalyzer
+from models.scan_analysis import ScanAnalyzer as ScanAnalysis
+from models.scan_model import SharedScanModel
+from models.registry import registry
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def rss_mb():
+    """Current resident set size in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+def load(quantized):
+    before = rss_mb()
+    start = time.time()
+    model = SharedScanModel(quantized=quantized)
+    return model, time.time() - start, rss_mb() - before
+
+def latency(serving, images, runs):
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        serving(images[i % len(images)])
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', nargs='?', help='directory of scan images')
+    parser.add_argument('--runs', type=int, default=50, help='timed single-image calls per model')
+    parser.add_argument('--limit', type=int, default=100, help='maximum number of images')
+    args = parser.parse_args()
+
+    # Load int8 first so the float model's memory does not mask it
+    quantized, int8_load, int8_mem = load(True)
+    full, float_load, float_mem = load(False)
+    if quantized.backbone is not None:
+        print("No current int8 export found; run export_quantized_models.py first")
+        return
+
+    # Build every analyzer on the float model so all heads are loaded
+    registry.register('scan_model', lambda: full)
+    analyzer = ImageAnalyzer()
+    ScanAnalyzer()
+    ScanAnalysis()
+
+    if args.images:
+        paths = sorted(
+            os.path.join(args.images, name) for name in os.listdir(args.images)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )[:args.limit]
+        images = [analyzer.preprocess_image(path) for path in paths]
+    else:
+        rng = np.random.default_rng(0)
+        images = [rng.random((1, 224, 224, 3), dtype=np.float32) for _ in range(16)]
+
+    float_p50, float_p95 = latency(full.serving, images, args.runs)
+    int8_p50, int8_p95 = latency(quantized.serving, images, args.runs)
+
+    print(f"{'':12}{'float32':>12}{'int8':>12}")
+    print(f"{'load (s)':12}{float_load:12.2f}{int8_load:12.2f}")
+    print(f"{'RSS (MB)':12}{float_mem:12.1f}{int8_mem:12.1f}")
+    print(f"{'p50 (ms)':12}{float_p50:12.1f}{int8_p50:12.1f}")
+    print(f"{'p95 (ms)':12}{float_p95:12.1f}{int8_p95:12.1f}")
+
+    float_features = np.concatenate([full.serving(image) for image in images])
+    int8_features = np.concatenate([quantized.serving(image) for image in images])
+    print(f"\nAgreement over {len(images)} images:")
+    for name, head in sorted(full.heads.items()):
+        float_out, int8_out = head(float_features), head(int8_features)
+        diff = np.abs(float_out - int8_out)
+        print(f"  {name:18} max |diff| {diff.max():.4f}  "
+              f"labels (>0.5) agree {np.mean((float_out > 0.5) == (int8_out > 0.5)):6.1%}  "
+              f"top-1 agrees {np.mean(float_out.argmax(axis=1) == int8_out.argmax(axis=1)):6.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Export an int8 TFLite version of the shared scan backbone.
+
+Calibrates on a small set of representative scans preprocessed exactly as the
+analyzers do at serving time (the per-task heads stay float):
+
+    python export_quantized_models.py path/to/calibration_images [--limit 200]
+
+Then start the app with SCAN_MODEL_INT8=1 to serve from the exports.
+"""
+import os
+import sys
+import time
+import argparse
+from models.image_analyzer import ImageAnalyzer
+from models.scan_analysis import ScanAnalyzer as ScanAnalysis
+from models.scan_model import SharedScanModel, BACKBONE_VERSION
+from models.model_store import model_store
+from models.registry import registry
+from models.quantization import export_int8
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def list_images(directory, limit):
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return paths[:limit]
+
+def preprocess_all(preprocess, paths):
+    """Preprocessed batches for every path, skipping images that fail to load"""
+    images, errors = [], []
+    for path in paths:
+        try:
+            image = preprocess(path)
+        except Exception as e:
+            image, errors = None, errors + [str(e)]
+        if image is not None:
+            images.append(image)
+    if errors:
+        print(f"  skipped {len(errors)} image(s) that failed preprocessing, e.g. {errors[0]}")
+    return images
+
+def export(shared, samples):
+    if not samples:
+        sys.exit("No calibration images could be preprocessed")
+    print(f"Quantizing scan_backbone on {len(samples)} calibration images...")
+    start = time.time()
+    tflite_model = export_int8(shared.backbone, samples)
+    model_store.save_quantized('scan_backbone', tflite_model, shared.manifest, len(samples))
+    print(f"  done in {time.time() - start:.1f}s, {len(tflite_model) / 1e6:.1f} MB")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('images', help='directory of representative scan images')
+    parser.add_argument('--limit', type=int, default=200, help='maximum number of calibration images')
+    args = parser.parse_args()
+
+    paths = list_images(args.images, args.limit)
+    if not paths:
+        sys.exit(f"No images found in {args.images}")
+
+    # Always quantize from the float artifact
+    shared = SharedScanModel(quantized=False)
+    registry.register('scan_model', lambda: shared)
+
+    # ImageAnalyzer and scan_analyzer scale pixels to [0, 1]; scan_analysis feeds
+    # DenseNet-normalized input, so calibrate on both value ranges
+    analyzer = ImageAnalyzer()
+    analysis = ScanAnalysis()
+    export(shared, preprocess_all(analyzer.preprocess_image, paths) + preprocess_all(analysis.preprocess_scan, paths))
+
+    print(f"\nExport written to {model_store.root} (scan_backbone v{BACKBONE_VERSION})")
+
+if __name__ == "__main__":
+    main()
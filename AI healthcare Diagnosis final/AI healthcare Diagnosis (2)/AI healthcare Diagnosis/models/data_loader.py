@@ -1,78 +1,215 @@
 import pandas as pd
 import os
-from typing import Dict, List, Set
+import hashlib
+import pickle
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Set
+from .symptom_profiles import SymptomProfileIndex
+
+# Bump when the layout of the compiled dataset cache changes
+CACHE_VERSION = 1
+
+DATASET_FILES = ('disease_dataset.csv', 'precautions_dataset.csv', 'doctors_dataset.csv')
 
 class DataLoader:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         """Initialize DataLoader and load datasets"""
         self.data_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets')
+        self.cache_file = os.path.join(os.path.dirname(__file__), '..', 'data', 'cache', 'datasets.pkl')
+        self.use_cache = use_cache
+
+        # Raw DataFrames are only populated when the CSVs are parsed
         self.disease_data = None
         self.precautions_data = None
         self.doctors_data = None
+
+        self.profile_index = None
+        self.all_symptoms = frozenset()
+        self.all_diseases = ()
+        self.precautions_by_disease = MappingProxyType({})
+        self.doctors_by_disease = MappingProxyType({})
+        self.general_doctors = ()
         self.load_data()
 
     def load_data(self):
-        """Load all datasets"""
+        """Load all datasets, from the compiled cache when it is up to date"""
         try:
-            # Load disease dataset
-            disease_file = os.path.join(self.data_dir, 'disease_dataset.csv')
-            self.disease_data = pd.read_csv(disease_file)
+            fingerprint = self._dataset_fingerprint()
+            tables = self._read_cache(fingerprint) if self.use_cache else None
 
-            # Load precautions dataset
-            precautions_file = os.path.join(self.data_dir, 'precautions_dataset.csv')
-            self.precautions_data = pd.read_csv(precautions_file)
+            if tables is None:
+                tables = self._build_tables()
+                if self.use_cache:
+                    self._write_cache(fingerprint, tables)
+                print("Successfully loaded all datasets")
+            else:
+                print("Successfully loaded all datasets from cache")
 
-            # Load doctors dataset
-            doctors_file = os.path.join(self.data_dir, 'doctors_dataset.csv')
-            self.doctors_data = pd.read_csv(doctors_file)
-            
-            print("Successfully loaded all datasets")
+            self._apply_tables(tables)
         except Exception as e:
             print(f"Error loading datasets: {str(e)}")
             raise
 
+    def _dataset_fingerprint(self) -> Dict[str, Dict[str, int]]:
+        """Modification time and size of each dataset file"""
+        fingerprint = {}
+        for name in DATASET_FILES:
+            stat = os.stat(os.path.join(self.data_dir, name))
+            fingerprint[name] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        return fingerprint
+
+    def _hash_file(self, name: str) -> str:
+        """SHA-256 of a dataset file"""
+        with open(os.path.join(self.data_dir, name), 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def _read_cache(self, fingerprint: Dict[str, Dict[str, int]]) -> Optional[Dict[str, Any]]:
+        """Return the cached tables if they were compiled from the current CSVs"""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                cached = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable dataset cache: {str(e)}")
+            return None
+
+        if cached.get('version') != CACHE_VERSION:
+            return None
+
+        sources = cached['sources']
+        if all(sources.get(name, {}).get('mtime_ns') == stat['mtime_ns'] and
+               sources.get(name, {}).get('size') == stat['size']
+               for name, stat in fingerprint.items()):
+            return cached['tables']
+
+        # Timestamps changed (e.g. after a checkout); fall back to content hashes
+        if all(sources.get(name, {}).get('sha256') == self._hash_file(name) for name in fingerprint):
+            self._write_cache(fingerprint, cached['tables'])
+            return cached['tables']
+        return None
+
+    def _write_cache(self, fingerprint: Dict[str, Dict[str, int]], tables: Dict[str, Any]):
+        """Atomically write the compiled tables keyed by the source fingerprint"""
+        sources = {
+            name: dict(stat, sha256=self._hash_file(name))
+            for name, stat in fingerprint.items()
+        }
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'sources': sources, 'tables': tables},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Could not write dataset cache: {str(e)}")
+
+    def _build_tables(self) -> Dict[str, Any]:
+        """Parse the CSVs and compile every lookup structure"""
+        # Load disease dataset
+        disease_file = os.path.join(self.data_dir, 'disease_dataset.csv')
+        self.disease_data = pd.read_csv(disease_file)
+
+        # Load precautions dataset
+        precautions_file = os.path.join(self.data_dir, 'precautions_dataset.csv')
+        self.precautions_data = pd.read_csv(precautions_file)
+
+        # Load doctors dataset
+        doctors_file = os.path.join(self.data_dir, 'doctors_dataset.csv')
+        self.doctors_data = pd.read_csv(doctors_file)
+
+        symptom_columns = [col for col in self.disease_data.columns if col.startswith('Symptom_')]
+        symptom_cells = self.disease_data[symptom_columns].to_numpy(dtype=object)
+
+        tables = {
+            # Index every distinct row-level symptom profile
+            'profile_index': SymptomProfileIndex.from_dataframe(self.disease_data).to_dict(),
+            'all_symptoms': sorted(pd.unique(symptom_cells[pd.notna(symptom_cells)]).tolist()),
+            'all_diseases': sorted(self.disease_data['Disease'].unique().tolist())
+        }
+
+        # Precompute per-disease precaution and doctor lookups
+        tables.update(self._build_lookup_tables())
+        return tables
+
+    def _apply_tables(self, tables: Dict[str, Any]):
+        """Expose compiled tables as read-only attributes"""
+        self.profile_index = SymptomProfileIndex(**tables['profile_index'])
+        self.all_symptoms = frozenset(tables['all_symptoms'])
+        self.all_diseases = tuple(tables['all_diseases'])
+        self.precautions_by_disease = MappingProxyType({
+            disease: tuple(precautions)
+            for disease, precautions in tables['precautions'].items()
+        })
+        self.doctors_by_disease = MappingProxyType({
+            disease: tuple(MappingProxyType(doctor) for doctor in doctors)
+            for disease, doctors in tables['doctors'].items()
+        })
+        self.general_doctors = tuple(MappingProxyType(doctor) for doctor in tables['general_doctors'])
+
     def get_all_symptoms(self) -> Set[str]:
         """Get all unique symptoms from the disease dataset"""
-        symptoms = set()
-        symptom_columns = [col for col in self.disease_data.columns if col.startswith('Symptom_')]
-        for col in symptom_columns:
-            symptoms.update(self.disease_data[col].dropna().unique())
-        return symptoms
+        return set(self.all_symptoms)
 
     def get_disease_symptoms(self) -> Dict[str, List[str]]:
-        """Get symptoms for each disease"""
-        disease_symptoms = {}
-        symptom_columns = [col for col in self.disease_data.columns if col.startswith('Symptom_')]
-        
-        for _, row in self.disease_data.iterrows():
-            disease = row['Disease']
-            symptoms = [row[col] for col in symptom_columns if pd.notna(row[col])]
-            disease_symptoms[disease] = symptoms
-            
-        return disease_symptoms
+        """Get all normalized symptoms seen for each disease"""
+        return self.profile_index.disease_symptoms()
+
+    def get_profile_index(self) -> SymptomProfileIndex:
+        """Get the indexed row-level symptom profiles"""
+        return self.profile_index
+
+    def _format_doctor(self, doctor: Dict) -> Dict:
+        """Convert a doctors dataset record to the API representation"""
+        return {
+            'name': doctor['Doctor Name'],
+            'specialization': doctor['Specialization'],
+            'experience': doctor['Experience'],
+            'contact': doctor['Phone Number'],
+            'location': doctor['Hospital'],
+            'rating': f"{doctor['Rating']}/5.0",
+            'availability': doctor['Availability Time']
+        }
+
+    def _top_doctors(self, doctors: pd.DataFrame) -> List[Dict]:
+        """Top 5 doctors by rating, keeping dataset order for equal ratings"""
+        ranked = doctors.sort_values('Rating', ascending=False, kind='stable').head(5)
+        return [self._format_doctor(doctor) for doctor in ranked.to_dict('records')]
+
+    def _build_lookup_tables(self) -> Dict[str, Any]:
+        """Build lowercase disease -> precautions / doctors tables"""
+        # Precautions come from the first row of each disease, as before
+        first_rows = self.precautions_data.groupby(
+            self.precautions_data['Disease'].str.lower(), sort=False
+        ).head(1)
+        precautions = {}
+        for disease, row in zip(first_rows['Disease'].str.lower(), first_rows.iloc[:, 1:].to_numpy(dtype=object)):
+            precautions[disease] = sorted({p for p in row if pd.notna(p)})
+
+        doctors = {
+            disease: self._top_doctors(group)
+            for disease, group in self.doctors_data.groupby(self.doctors_data['Disease'].str.lower(), sort=False)
+        }
+
+        # Fallback for diseases without dedicated doctors
+        general = self.doctors_data[self.doctors_data['Specialization'].str.contains('General', case=False, na=False)]
+
+        return {
+            'precautions': precautions,
+            'doctors': doctors,
+            'general_doctors': self._top_doctors(general)
+        }
 
     def get_disease_precautions(self, disease: str) -> List[str]:
         """Get precautions for a specific disease"""
         try:
-            # Find the precautions for the disease
-            precautions = self.precautions_data[self.precautions_data['Disease'].str.lower() == disease.lower()]
-            
-            if precautions.empty:
-                return ["No specific precautions found for this condition. Please consult a doctor."]
-            
-            # Get the first row of precautions for this disease
-            first_precautions = precautions.iloc[0]
+            precautions = self.precautions_by_disease.get(disease.lower())
             
-            # Get unique precautions (excluding the Disease column)
-            unique_precautions = set(first_precautions[1:].unique())  # Skip the Disease column
-            
-            # Remove any NaN values and format the precautions
-            formatted_precautions = [p for p in unique_precautions if pd.notna(p)]
-            
-            if not formatted_precautions:
+            if not precautions:
                 return ["No specific precautions found for this condition. Please consult a doctor."]
                 
-            return sorted(formatted_precautions)  # Sort for consistent ordering
+            return list(precautions)
             
         except Exception as e:
             print(f"Error getting precautions: {str(e)}")
@@ -81,28 +218,9 @@ class DataLoader:
     def get_doctors_for_disease(self, disease: str) -> List[Dict]:
         """Get recommended doctors for a specific disease"""
         try:
-            # Find doctors for this disease
-            doctors = self.doctors_data[self.doctors_data['Disease'].str.lower() == disease.lower()]
-            
-            if doctors.empty:
-                # If no exact match, return general practitioners
-                doctors = self.doctors_data[self.doctors_data['Specialization'].str.contains('General', case=False, na=False)]
-            
-            # Convert to list of dictionaries
-            doctors_list = []
-            for _, doctor in doctors.iterrows():
-                doctors_list.append({
-                    'name': doctor['Doctor Name'],
-                    'specialization': doctor['Specialization'],
-                    'experience': doctor['Experience'],
-                    'contact': doctor['Phone Number'],
-                    'location': doctor['Hospital'],
-                    'rating': f"{doctor['Rating']}/5.0",
-                    'availability': doctor['Availability Time']
-                })
-            
-            # Sort by rating (highest first) and take top 5
-            doctors_list = sorted(doctors_list, key=lambda x: float(x['rating'].split('/')[0]), reverse=True)[:5]
+            # If no exact match, return general practitioners
+            doctors = self.doctors_by_disease.get(disease.lower()) or self.general_doctors
+            doctors_list = [dict(doctor) for doctor in doctors]
             
             return doctors_list if doctors_list else [
                 {
@@ -130,6 +248,4 @@ class DataLoader:
 
     def get_all_diseases(self) -> List[str]:
         """Get a list of all unique diseases"""
-        if self.disease_data is None:
-            return []
-        return sorted(self.disease_data['Disease'].unique().tolist()) 
\ No newline at end of file
+        return list(self.all_diseases) 
\ No newline at end of file
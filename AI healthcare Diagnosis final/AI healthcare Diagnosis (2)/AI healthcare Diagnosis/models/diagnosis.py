@@ -1,75 +1,98 @@
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from .data_loader import DataLoader
+from .registry import get_data_loader
+from .symptom_profiles import normalize_symptom
+
+# Number of ranked conditions returned and the score a condition needs to be listed
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SCORE = 0.3
 
 class DiagnosisModel:
-    def __init__(self):
+    def __init__(self, data_loader: Optional[DataLoader] = None, aggregate: str = 'max'):
         """Initialize the diagnosis model with data from DataLoader"""
-        self.data_loader = DataLoader()
-        self.symptoms = self.data_loader.get_all_symptoms()
-        self.disease_symptoms = self.data_loader.get_disease_symptoms()
-        self.diseases = list(self.disease_symptoms.keys())
+        # Reuse the shared loader instead of parsing the datasets again
+        self.data_loader = data_loader if data_loader is not None else get_data_loader()
+        self.profiles = self.data_loader.get_profile_index()
+        self.aggregate = aggregate
+        # Symptoms are handled as interned integer ids past the API edge
+        self.symptoms = self.profiles.symptoms
+        self.disease_symptoms = self.profiles.disease_symptom_ids()
+        self.diseases = self.profiles.diseases
 
     def _normalize_text(self, text: str) -> str:
         """Normalize text for better matching"""
-        return text.lower().strip()
+        return normalize_symptom(text)
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first (ties keep dataset order)"""
+        if k <= 0:
+            return np.empty(0, dtype=int)
+        k = min(k, len(scores))
+        # Partial selection of the k-th best score, then fill ties in index order
+        kth_score = np.partition(scores, len(scores) - k)[len(scores) - k]
+        above = np.flatnonzero(scores > kth_score)
+        ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+        candidates = np.concatenate([above, ties])
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+
+    def _build_result(self, top_matches: List[Tuple[str, float]], min_score: float) -> Dict[str, Any]:
+        """Turn the ranked (disease, score) matches into a diagnosis result"""
+        if not top_matches or top_matches[0][1] == 0:
+            return {"error": "No matching diseases found for the given symptoms"}
+
+        # Primary prediction
+        predicted_disease = top_matches[0][0]
+        confidence = top_matches[0][1]
+
+        # Get precautions for the predicted disease
+        precautions = self.data_loader.get_disease_precautions(predicted_disease)
+
+        # Get possible conditions (diseases scoring above min_score)
+        possible_conditions = [
+            {"disease": disease, "probability": f"{score * 100:.1f}%"}
+            for disease, score in top_matches
+            if score > min_score
+        ]
 
-    def _calculate_symptom_match_score(self, input_symptoms: List[str], disease_symptoms: List[str]) -> float:
-        """Calculate how well the input symptoms match with disease symptoms"""
-        input_symptoms_set = set(map(self._normalize_text, input_symptoms))
-        disease_symptoms_set = set(map(self._normalize_text, disease_symptoms))
-        
-        # Calculate intersection and union
-        matching_symptoms = len(input_symptoms_set.intersection(disease_symptoms_set))
-        total_symptoms = len(disease_symptoms_set)
-        
-        # Calculate score based on matching symptoms
-        if total_symptoms == 0:
-            return 0.0
-        
-        return matching_symptoms / total_symptoms
+        return {
+            "predicted_disease": predicted_disease,
+            "confidence": confidence,
+            "possible_conditions": possible_conditions,
+            "precautions": precautions
+        }
 
-    def predict(self, symptoms: List[str]) -> Dict[str, Any]:
+    def predict(self, symptoms: List[str], top_k: int = DEFAULT_TOP_K,
+                min_score: float = DEFAULT_MIN_SCORE) -> Dict[str, Any]:
         """Predict disease based on input symptoms"""
         try:
             if not symptoms:
                 return {"error": "No symptoms provided"}
 
-            # Calculate match scores for each disease
-            disease_scores = []
-            for disease, disease_symptoms in self.disease_symptoms.items():
-                score = self._calculate_symptom_match_score(symptoms, disease_symptoms)
-                disease_scores.append((disease, score))
+            # Only profiles sharing at least one input symptom are scored
+            symptom_ids = self.profiles.symptom_ids(symptoms)
+            top_matches = self.profiles.top_diseases(symptom_ids, top_k, self.aggregate)
+            return self._build_result(top_matches, min_score)
 
-            # Sort diseases by score
-            disease_scores.sort(key=lambda x: x[1], reverse=True)
-
-            # Get top matches
-            top_matches = disease_scores[:3]
-            
-            if top_matches[0][1] == 0:
-                return {"error": "No matching diseases found for the given symptoms"}
-
-            # Primary prediction
-            predicted_disease = top_matches[0][0]
-            confidence = top_matches[0][1]
-
-            # Get precautions for the predicted disease
-            precautions = self.data_loader.get_disease_precautions(predicted_disease)
+        except Exception as e:
+            return {"error": f"Error in disease prediction: {str(e)}"}
 
-            # Get possible conditions (diseases with score > 0.3)
-            possible_conditions = [
-                {"disease": disease, "probability": f"{score * 100:.1f}%"}
-                for disease, score in top_matches
-                if score > 0.3
-            ]
+    def predict_batch(self, symptom_sets: List[List[str]], top_k: int = DEFAULT_TOP_K,
+                      min_score: float = DEFAULT_MIN_SCORE) -> List[Dict[str, Any]]:
+        """Predict diseases for several symptom lists at once"""
+        try:
+            # Score the whole batch as a single query x profile matrix product
+            id_sets = [self.profiles.symptom_ids(symptoms) for symptoms in symptom_sets]
+            scores = self.profiles.score_diseases_batch(id_sets, self.aggregate)
 
-            return {
-                "predicted_disease": predicted_disease,
-                "confidence": confidence,
-                "possible_conditions": possible_conditions,
-                "precautions": precautions
-            }
+            results = []
+            for symptoms, row in zip(symptom_sets, scores):
+                if not symptoms:
+                    results.append({"error": "No symptoms provided"})
+                    continue
+                top_matches = [(self.diseases[idx], float(row[idx])) for idx in self._top_k(row, top_k) if row[idx] > 0]
+                results.append(self._build_result(top_matches, min_score))
+            return results
 
         except Exception as e:
-            return {"error": f"Error in disease prediction: {str(e)}"} 
\ No newline at end of file
+            return [{"error": f"Error in disease prediction: {str(e)}"} for _ in symptom_sets]
@@ -5,16 +5,21 @@ from tensorflow.keras.applications import ResNet50
 from tensorflow.keras.preprocessing import image
 import numpy as np
 from PIL import Image
-import pytesseract
-from pdf2image import convert_from_path
 import re
 import cv2
 import sys
 import subprocess
 import logging
+from models.registry import get_scan_model, get_ocr_pool
+from models.image_io import decode_image, is_pdf
+from models.preprocessing import SCAN_PIPELINE, OCR_ENHANCED_PIPELINE, image_features
+from models.report_extractor import extract_report_info, summary_sentences
 
 logger = logging.getLogger(__name__)
 
+# Bump when OCR preprocessing or report extraction changes so cached report results are invalidated
+REPORT_PARSER_VERSION = 5
+
 class ImageAnalyzer:
     def __init__(self):
         # Define conditions first
@@ -40,69 +45,36 @@ class ImageAnalyzer:
                 'severity_levels': ['mild', 'moderate', 'severe']
             }
         }
-        # Then load the model
-        self.model = self._load_model()
-        
-        # Medical terms and patterns for enhanced analysis
-        self.medical_sections = {
-            'diagnosis': r'diagnosis|assessment|impression',
-            'medications': r'medications|drugs|prescriptions',
-            'vitals': r'vital signs|vitals|measurements',
-            'recommendations': r'recommendations|plan|follow-up',
-            'history': r'history|background|previous conditions'
-        }
+        # Then attach this analyzer's head to the shared scan backbone
+        self.scan_model = None
+        self.head = None
+        self._load_model()
 
     def _load_model(self):
         try:
-            # Load pre-trained model for medical image analysis
-            model = tf.keras.applications.DenseNet121(
-                weights='imagenet',
-                include_top=False,
-                input_shape=(224, 224, 3)
-            )
-            
-            # Add custom layers for medical condition detection
-            x = model.output
-            x = tf.keras.layers.GlobalAveragePooling2D()(x)
-            x = tf.keras.layers.Dense(1024, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.5)(x)
-            predictions = tf.keras.layers.Dense(len(self.conditions), activation='sigmoid')(x)
-            
-            return tf.keras.Model(inputs=model.input, outputs=predictions)
+            self.scan_model = get_scan_model()
+            self.head = self.scan_model.head('image_analyzer', list(self.conditions))
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
-            return None
+            self.scan_model = None
+            self.head = None
 
-    def preprocess_image(self, image_path):
+    def preprocess_image(self, source):
         try:
-            # Load and preprocess the image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise Exception("Could not read image file")
-            
-            # Convert to RGB
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Resize to standard size
-            image = cv2.resize(image, (224, 224))
-            
-            # Normalize pixel values
-            image = image.astype(np.float32) / 255.0
-            
-            # Add batch dimension
-            image = np.expand_dims(image, axis=0)
-            
-            return image
+            # Decode (unless already decoded), convert to RGB, resize to 224x224,
+            # scale to [0, 1] and add the batch dimension
+            return SCAN_PIPELINE(source)
         except Exception as e:
             raise Exception(f"Error preprocessing image: {str(e)}")
 
-    def analyze_image(self, image_path):
+    def analyze_image(self, source):
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image_path)
+            # Decode once; the decoded upload feeds the model preprocessing
+            image = decode_image(source)
+            processed_image = self.preprocess_image(image)
             
             # Get model predictions
-            predictions = self.model.predict(processed_image)
+            predictions = self.predict(processed_image)
             
             # Process results
             results = {
@@ -115,18 +87,23 @@ class ImageAnalyzer:
                 'recommendations': []
             }
             
+            # Image features for indicator checks, extracted once on first detection
+            features = None
+
             # Analyze predictions for each condition
             for idx, (condition, details) in enumerate(self.conditions.items()):
                 confidence = float(predictions[0][idx])
                 if confidence > 0.5:  # Detection threshold
                     severity = self._determine_severity(confidence)
+                    if features is None:
+                        features = self._extract_features(image)
                     results['findings']['detected_conditions'][condition] = {
                         'confidence': confidence,
                         'severity': severity,
                         'description': details['description'],
                         'indicators': [
                             indicator for indicator in details['indicators']
-                            if self._detect_indicator(processed_image, indicator)
+                            if self._detect_indicator(features, indicator)
                         ]
                     }
                     
@@ -162,6 +139,16 @@ class ImageAnalyzer:
                 'error': f"Analysis failed: {str(e)}"
             }
 
+    def report_version(self):
+        """Version of the report pipeline, used to key cached report analyses"""
+        return f"report-{REPORT_PARSER_VERSION}"
+
+    def predict(self, images):
+        """Score a batch of images with this analyzer's head on shared backbone features"""
+        if self.head is None:
+            raise Exception("Model not loaded")
+        return self.head(self.scan_model.features(images))
+
     def _determine_severity(self, confidence):
         if confidence > 0.8:
             return 'severe'
@@ -170,17 +157,14 @@ class ImageAnalyzer:
         else:
             return 'mild'
 
-    def _detect_indicator(self, image, indicator):
+    def _detect_indicator(self, features, indicator):
         # Implement specific detection logic for each indicator
         # This is a simplified version - in practice, you would have more sophisticated detection methods
         try:
             # Convert indicator to lowercase for comparison
             indicator = indicator.lower()
             
-            # Get image features
-            features = self._extract_features(image)
-            
-            # Check for specific indicators
+            # Check for specific indicators against the image's precomputed features
             if 'opacity' in indicator:
                 return self._detect_opacity(features)
             elif 'nodule' in indicator or 'mass' in indicator:
@@ -191,33 +175,17 @@ class ImageAnalyzer:
                 return self._detect_effusion(features)
             
             # Default to basic threshold-based detection
-            return np.mean(features) > 0.5
+            return features['mean_intensity'] / 255.0 > 0.5
             
         except Exception:
             return False
 
     def _extract_features(self, image):
-        # Extract relevant features from the image
-        # This is a simplified version - in practice, you would use more sophisticated feature extraction
+        # Grayscale, histogram, mean/std and edges, computed once per image for all indicators
         try:
-            # Convert to grayscale if not already
-            if len(image.shape) > 2:
-                gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            else:
-                gray = image
-                
-            # Apply various feature extraction techniques
-            features = {
-                'histogram': cv2.calcHist([gray], [0], None, [256], [0, 256]),
-                'mean_intensity': np.mean(gray),
-                'std_intensity': np.std(gray),
-                'edges': cv2.Canny(gray, 100, 200)
-            }
-            
-            return features
-            
+            return image_features(image)
         except Exception as e:
-            print(f"Error extracting features: {str(e)}")
+            logger.warning(f"Error extracting features: {str(e)}")
             return None
 
     def _detect_opacity(self, features):
@@ -230,7 +198,7 @@ class ImageAnalyzer:
     def _detect_nodules(self, features):
         # Detect potential nodules or masses
         try:
-            return np.max(features['edges']) > 200
+            return features['max_edge'] > 200
         except:
             return False
 
@@ -310,79 +278,39 @@ class ImageAnalyzer:
         
         return list(set(recommendations))  # Remove duplicates
 
-    def preprocess_image_for_ocr(self, image_path):
+    def preprocess_image_for_ocr(self, source):
         """Enhanced image preprocessing for better OCR results"""
         try:
-            # Read image
-            img = cv2.imread(image_path)
-            if img is None:
-                raise ValueError("Could not read image file")
-            
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Apply adaptive thresholding
-            thresh = cv2.adaptiveThreshold(
-                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                cv2.THRESH_BINARY, 11, 2
-            )
-            
-            # Denoise
-            denoised = cv2.fastNlMeansDenoising(thresh)
-            
-            # Enhance contrast
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            enhanced = clahe.apply(denoised)
-            
-            # Apply dilation to connect text components
-            kernel = np.ones((2,2), np.uint8)
-            dilated = cv2.dilate(enhanced, kernel, iterations=1)
-            
-            return dilated
+            # Grayscale, adaptive threshold, denoise (optional/downscaled, see
+            # OCR_DENOISE_SCALE), CLAHE and dilation with precreated kernels
+            return OCR_ENHANCED_PIPELINE(source)
             
         except Exception as e:
             print(f"Error in image preprocessing: {str(e)}")
             return None
 
-    def extract_text_from_image(self, image_path):
+    def extract_text_from_image(self, source):
         """
-        Extract text from an image using OCR.
+        Extract text from an image (path, bytes or file-like object) using OCR.
         """
         try:
-            # Read the image using OpenCV
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Failed to load image")
-
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # Apply thresholding to preprocess the image
-            gray = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
-
-            # Apply dilation to connect text components
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3,3))
-            gray = cv2.dilate(gray, kernel, iterations=1)
-
-            # Convert to PIL Image
-            pil_image = Image.fromarray(gray)
-
-            # Extract text using Tesseract
-            text = pytesseract.image_to_string(pil_image)
-            
-            return text.strip()
+            # Decoding, thresholding and Tesseract run in the shared OCR worker pool
+            return get_ocr_pool().extract_text(source)
             
         except Exception as e:
             logger.error(f"Error in text extraction: {str(e)}")
             raise
 
-    def analyze_report(self, image_path):
+    def analyze_report(self, source):
         """
-        Analyze a medical report image and extract structured information.
+        Analyze a medical report image or PDF and extract structured information.
         """
         try:
+            if is_pdf(source):
+                return self._analyze_pdf_report(source)
+
             # Extract text from the report
-            text = self.extract_text_from_image(image_path)
+            text = self.extract_text_from_image(source)
             if not text:
                 return {
                     'success': False,
@@ -410,20 +338,49 @@ class ImageAnalyzer:
                 'error': str(e)
             }
 
+    def _analyze_pdf_report(self, source):
+        """
+        Read a PDF page by page (text layer, or OCR for pages without one),
+        then extract structured information from the text of all pages.
+        """
+        page_texts = []
+        page_timings = []
+
+        for page in get_ocr_pool().pdf_pages(source):
+            page_timings.append({'page': page.number, 'method': page.method, 'ms': round(page.seconds * 1000, 1)})
+            if page.text:
+                page_texts.append(page.text)
+
+        if not page_texts:
+            return {
+                'success': False,
+                'error': 'No text could be extracted from the PDF'
+            }
+
+        # Pages are rendered and OCRed one at a time, but their text is only a
+        # few KB each; extracting once from the joined text (linear in its
+        # length) reads sections and phrases that cross a page break exactly
+        # as in a single-page report
+        text = '\n'.join(page_texts)
+        report_info = self._extract_structured_info(text)
+        report_info['summary'] = self._generate_summary(text)
+
+        logger.info(f"PDF report: {len(page_timings)} pages, "
+                    f"{sum(timing['method'] == 'ocr' for timing in page_timings)} OCRed")
+        return {
+            'success': True,
+            'pages': len(page_timings),
+            'page_timings': page_timings,
+            'report_info': report_info
+        }
+
     def _generate_summary(self, text):
         """
         Generate a concise summary of the medical report without using transformers.
         """
         try:
-            # Simple extractive summarization
-            sentences = text.split('.')
-            # Select important sentences containing medical terms
-            important_sentences = []
-            medical_terms = ['diagnosis', 'condition', 'treatment', 'symptoms', 'findings']
-            
-            for sentence in sentences:
-                if any(term in sentence.lower() for term in medical_terms):
-                    important_sentences.append(sentence.strip())
+            # Simple extractive summarization: select important sentences containing medical terms
+            important_sentences = summary_sentences(text)
             
             # Return first 3 important sentences or all if less than 3
             summary = '. '.join(important_sentences[:3])
@@ -437,130 +394,7 @@ class ImageAnalyzer:
         """
         Extract structured information from the report text.
         """
-        report_info = {
-            'diagnosis': [],
-            'medications': [],
-            'vitals': {},
-            'recommendations': [],
-            'key_findings': []
-        }
-
-        # Process text by sections
-        for section, pattern in self.medical_sections.items():
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
-                # Get the text following the section header
-                start_pos = match.end()
-                section_text = text[start_pos:start_pos + 500]  # Look at next 500 chars
-                
-                # Extract relevant information based on section
-                if section == 'diagnosis':
-                    diagnoses = self._extract_diagnoses(section_text)
-                    report_info['diagnosis'].extend(diagnoses)
-                elif section == 'medications':
-                    meds = self._extract_medications(section_text)
-                    report_info['medications'].extend(meds)
-                elif section == 'vitals':
-                    vitals = self._extract_vitals(section_text)
-                    report_info['vitals'].update(vitals)
-                elif section == 'recommendations':
-                    recs = self._extract_recommendations(section_text)
-                    report_info['recommendations'].extend(recs)
-
-        # Extract any additional key findings
-        report_info['key_findings'] = self._extract_key_findings(text)
-
-        return report_info
-
-    def _extract_diagnoses(self, text):
-        """Extract diagnosis information from text."""
-        diagnoses = []
-        # Look for common diagnosis patterns
-        diagnosis_patterns = [
-            r"diagnosed with\s+([^.]*)",
-            r"diagnosis:?\s+([^.]*)",
-            r"impression:?\s+([^.]*)"
-        ]
-        
-        for pattern in diagnosis_patterns:
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
-                if match.group(1).strip():
-                    diagnoses.append(match.group(1).strip())
-        
-        return list(set(diagnoses))  # Remove duplicates
-
-    def _extract_medications(self, text):
-        """Extract medication information from text."""
-        medications = []
-        # Look for medication patterns
-        med_patterns = [
-            r"(\w+)\s+(\d+\s*(?:mg|mcg|ml|g))",
-            r"prescribed\s+([^.]*)",
-            r"taking\s+([^.]*)"
-        ]
-        
-        for pattern in med_patterns:
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
-                if match.group(1).strip():
-                    medications.append(match.group(0).strip())
-        
-        return list(set(medications))
-
-    def _extract_vitals(self, text):
-        """Extract vital signs from text."""
-        vitals = {}
-        vital_patterns = {
-            'blood_pressure': r"bp:?\s*(\d{2,3}\/\d{2,3})",
-            'heart_rate': r"(?:heart rate|pulse|hr):?\s*(\d{2,3})",
-            'temperature': r"(?:temp|temperature):?\s*(\d{2,3}(?:\.\d)?)",
-            'oxygen': r"(?:o2|oxygen|spo2):?\s*(\d{2,3}%?)"
-        }
-        
-        for vital, pattern in vital_patterns.items():
-            match = re.search(pattern, text.lower())
-            if match:
-                vitals[vital] = match.group(1)
-        
-        return vitals
-
-    def _extract_recommendations(self, text):
-        """Extract recommendations from text."""
-        recommendations = []
-        # Look for recommendation patterns
-        rec_patterns = [
-            r"recommend(?:ed|s)?\s+([^.]*)",
-            r"advised?\s+([^.]*)",
-            r"follow[- ]up:?\s+([^.]*)"
-        ]
-        
-        for pattern in rec_patterns:
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
-                if match.group(1).strip():
-                    recommendations.append(match.group(1).strip())
-        
-        return list(set(recommendations))
-
-    def _extract_key_findings(self, text):
-        """Extract key findings from text."""
-        findings = []
-        # Look for key finding patterns
-        finding_patterns = [
-            r"finding(?:s)?:?\s+([^.]*)",
-            r"noted:?\s+([^.]*)",
-            r"observed:?\s+([^.]*)",
-            r"shows:?\s+([^.]*)"
-        ]
-        
-        for pattern in finding_patterns:
-            matches = re.finditer(pattern, text.lower())
-            for match in matches:
-                if match.group(1).strip():
-                    findings.append(match.group(1).strip())
-        
-        return list(set(findings))
+        return extract_report_info(text)
 
     def _get_condition_name(self, index: int, scan_type: str) -> str:
         """Convert model index to condition name"""
@@ -603,4 +437,4 @@ class ImageAnalyzer:
                 if any(word in line for word in words):
                     report_info[category].append(line)
 
-        return report_info 
\ No newline at end of file
+        return report_info 
@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+from typing import BinaryIO, Optional, Union
+import numpy as np
+import cv2
+
+# Uploads up to this size stay in memory; larger (or unsized) bodies spill to a temp file
+SPILL_THRESHOLD = int(os.getenv('UPLOAD_SPILL_BYTES', str(8 * 1024 * 1024)))
+
+# Anything the analyzers accept as an image: a path, raw bytes/buffer, a file-like
+# object (e.g. an upload stream) or an already decoded BGR array
+ImageSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO, np.ndarray]
+
+def upload_stream_factory(total_content_length: Optional[int], content_type: Optional[str],
+                          filename: Optional[str] = None, content_length: Optional[int] = None) -> BinaryIO:
+    """Buffer for a multipart file part: in memory unless the request is large.
+
+    Werkzeug's default writes any body over 500 KB to a temporary file; this
+    keeps ordinary scans and reports in a BytesIO that ``read_buffer`` can view
+    without copying.
+    """
+    if total_content_length is not None and 0 <= total_content_length <= SPILL_THRESHOLD:
+        return io.BytesIO()
+    return tempfile.SpooledTemporaryFile(max_size=SPILL_THRESHOLD, mode='w+b')
+
+def read_buffer(source: ImageSource) -> memoryview:
+    """Bytes behind an in-memory source, viewed without copying where possible"""
+    if isinstance(source, memoryview):
+        return source
+    if isinstance(source, (bytes, bytearray)):
+        return memoryview(source)
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    # Generic file-like object (spooled temp file, socket stream, ...)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return memoryview(source.read())
+
+def is_pdf(source: ImageSource) -> bool:
+    """True for a .pdf path or a buffer/stream that starts with the PDF signature"""
+    if isinstance(source, np.ndarray):
+        return False
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source).lower().endswith('.pdf')
+    return bytes(read_buffer(source)[:5]) == b'%PDF-'
+
+def decode_image(source: ImageSource, flags: int = cv2.IMREAD_COLOR) -> np.ndarray:
+    """Decode a path, buffer or file-like object into a BGR uint8 image"""
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        image = cv2.imread(os.fspath(source), flags)
+    else:
+        image = cv2.imdecode(np.frombuffer(read_buffer(source), dtype=np.uint8), flags)
+    if image is None:
+        raise ValueError("Could not decode image")
+    return image
@@ -0,0 +1,102 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on images per forward pass and how long to wait for a batch to fill
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', '16'))
+DEFAULT_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', '5'))
+
+_STOP = object()
+
+class InferenceBatcher:
+    """Coalesce concurrent predict calls into batched forward passes.
+
+    Callers submit arrays with a leading batch dimension and block on the
+    result. A background thread collects requests until ``max_batch_size``
+    images are queued or ``max_wait_ms`` has passed since the first one, runs
+    ``predict_fn`` once on the concatenated batch and hands each caller its
+    own slice of the output.
+    """
+
+    def __init__(self, predict_fn: Callable[[np.ndarray], np.ndarray],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 name: str = 'inference'):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                self._thread.start()
+
+    def predict(self, inputs: np.ndarray, timeout: Optional[float] = None) -> np.ndarray:
+        """Queue inputs for the next batch and wait for their predictions"""
+        future: Future = Future()
+        self._ensure_started()
+        self._queue.put((inputs, future))
+        return future.result(timeout)
+
+    def _collect(self, first: Tuple[np.ndarray, Future]) -> List[Tuple[np.ndarray, Future]]:
+        """Gather queued requests until the batch is full or the wait expires"""
+        pending = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Finish this batch, then stop
+                self._queue.put(_STOP)
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            # Skip requests whose callers have already cancelled
+            pending = [(x, future) for x, future in self._collect(item) if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+            inputs = [x for x, _ in pending]
+            futures = [future for _, future in pending]
+
+            try:
+                outputs = np.asarray(self.predict_fn(np.concatenate(inputs, axis=0)))
+                offsets = np.cumsum([len(x) for x in inputs])[:-1]
+                for future, result in zip(futures, np.split(outputs, offsets)):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched inference failed: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+
+    def close(self):
+        """Stop the worker thread after draining queued requests"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
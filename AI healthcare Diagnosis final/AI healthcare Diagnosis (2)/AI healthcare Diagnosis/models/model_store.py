@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+import tensorflow as tf
+from models.quantization import QuantizedModel
+
+logger = logging.getLogger(__name__)
+
+# Where scan-model artifacts live; override to point at a shared/pre-trained directory
+ARTIFACT_DIR = os.getenv('SCAN_MODEL_DIR', os.path.join(os.path.dirname(__file__), 'artifacts'))
+
+class ModelStore:
+    """Versioned on-disk Keras model artifacts.
+
+    Each model is stored as a single HDF5 file ``<name>.h5`` (architecture plus
+    all weights, including the classifier head) next to a ``<name>.json``
+    manifest holding its version and metadata. HDF5 is read in place by h5py,
+    which loads DenseNet121 several times faster than unpacking a ``.keras``
+    zip archive.
+
+    ``load`` deserializes the artifact when the manifest matches, and only
+    calls the build function (ImageNet download and graph construction) when
+    the artifact is missing or stale, saving the result so every later boot
+    reuses the same weights.
+
+    An optional int8 TFLite export (``<name>.int8.tflite``) records which float
+    artifact it was calibrated from and is ignored once that artifact changes.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+
+    def paths(self, name: str) -> Tuple[str, str]:
+        return os.path.join(self.root, f"{name}.h5"), os.path.join(self.root, f"{name}.json")
+
+    def quantized_paths(self, name: str) -> Tuple[str, str]:
+        return os.path.join(self.root, f"{name}.int8.tflite"), os.path.join(self.root, f"{name}.int8.json")
+
+    def read_manifest(self, name: str) -> Optional[Dict[str, Any]]:
+        _, manifest_path = self.paths(name)
+        return self._read_json(manifest_path)
+
+    @staticmethod
+    def _read_json(path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_current(manifest: Optional[Dict[str, Any]], version: int, metadata: Dict[str, Any]) -> bool:
+        return manifest is not None and manifest.get('version') == version and manifest.get('metadata') == metadata
+
+    def load(self, name: str, version: int, build_fn: Callable[[], tf.keras.Model],
+             metadata: Optional[Dict[str, Any]] = None) -> Tuple[tf.keras.Model, Dict[str, Any]]:
+        """Return (model, manifest), building and saving the artifact if needed"""
+        metadata = metadata or {}
+        model_path, _ = self.paths(name)
+        manifest = self.read_manifest(name)
+
+        if self._is_current(manifest, version, metadata) and os.path.exists(model_path):
+            start = time.perf_counter()
+            try:
+                model = tf.keras.models.load_model(model_path, compile=False)
+                logger.info(f"Loaded {name} v{version} from {model_path} in {time.perf_counter() - start:.2f}s")
+                return model, manifest
+            except Exception as e:
+                logger.warning(f"Could not load model artifact {model_path}, rebuilding: {str(e)}")
+
+        logger.info(f"Building {name} v{version}; no usable artifact in {self.root}")
+        model = build_fn()
+        try:
+            manifest = self.save(name, model, version, metadata)
+        except OSError as e:
+            # A read-only deployment still serves the freshly built model
+            logger.warning(f"Could not save model artifact for {name}: {str(e)}")
+            manifest = self._manifest(name, model, version, metadata)
+        return model, manifest
+
+    def save(self, name: str, model: tf.keras.Model, version: int,
+             metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Write the artifact and its manifest atomically"""
+        os.makedirs(self.root, exist_ok=True)
+        model_path, manifest_path = self.paths(name)
+        manifest = self._manifest(name, model, version, metadata or {})
+
+        tmp_model = os.path.join(self.root, f"{name}.{os.getpid()}.tmp.h5")
+        tmp_manifest = f"{manifest_path}.{os.getpid()}.tmp"
+        model.save(tmp_model)
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_model, model_path)
+        os.replace(tmp_manifest, manifest_path)
+        logger.info(f"Saved {name} v{version} to {model_path}")
+        return manifest
+
+    def load_quantized(self, name: str, version: int,
+                       metadata: Optional[Dict[str, Any]] = None) -> Optional[Tuple[QuantizedModel, Dict[str, Any]]]:
+        """Return (interpreter, float manifest) for an up-to-date int8 export, else None"""
+        manifest = self.read_manifest(name)
+        tflite_path, quantized_manifest_path = self.quantized_paths(name)
+        quantized_manifest = self._read_json(quantized_manifest_path)
+
+        if not self._is_current(manifest, version, metadata or {}) or quantized_manifest is None \
+                or quantized_manifest.get('source_created') != manifest.get('created') or not os.path.exists(tflite_path):
+            logger.warning(f"No current int8 export for {name} v{version}; serving the float model")
+            return None
+        try:
+            model = QuantizedModel(tflite_path)
+        except Exception as e:
+            logger.warning(f"Could not load int8 model {tflite_path}: {str(e)}")
+            return None
+        logger.info(f"Loaded int8 {name} v{version} from {tflite_path}")
+        return model, manifest
+
+    def save_quantized(self, name: str, tflite_model: bytes, manifest: Dict[str, Any],
+                       calibration_size: int) -> Dict[str, Any]:
+        """Write an int8 export of the float artifact described by ``manifest``"""
+        os.makedirs(self.root, exist_ok=True)
+        tflite_path, quantized_manifest_path = self.quantized_paths(name)
+        quantized_manifest = {
+            'name': name,
+            'version': manifest['version'],
+            'format': 'tflite-int8',
+            'source_created': manifest['created'],
+            'calibration_images': calibration_size,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+
+        tmp_path = f"{tflite_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(tflite_model)
+        os.replace(tmp_path, tflite_path)
+        with open(quantized_manifest_path, 'w') as f:
+            json.dump(quantized_manifest, f, indent=2)
+        logger.info(f"Saved int8 {name} v{manifest['version']} to {tflite_path} ({len(tflite_model) / 1e6:.1f} MB)")
+        return quantized_manifest
+
+    @staticmethod
+    def _manifest(name: str, model: tf.keras.Model, version: int, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'name': name,
+            'version': version,
+            'format': 'h5',
+            'tensorflow': tf.__version__,
+            'input_shape': list(model.input_shape[1:]),
+            'output_shape': list(model.output_shape[1:]),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'metadata': metadata
+        }
+
+model_store = ModelStore()
@@ -0,0 +1,260 @@
+import os
+import time
+import shutil
+import logging
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+from multiprocessing.util import Finalize
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Iterator, NamedTuple, Optional
+import numpy as np
+from PIL import Image
+import pytesseract
+from pdf2image import convert_from_path, pdfinfo_from_path
+from models.image_io import ImageSource, read_buffer
+from models.preprocessing import OCR_PIPELINE
+
+# tesserocr keeps one initialized Tesseract engine per worker; without it each
+# page is OCRed by a pytesseract subprocess
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for report OCR; 0 runs OCR inline in the calling thread
+OCR_PROCESSES = int(os.getenv('OCR_PROCESSES', str(max(1, (os.cpu_count() or 2) - 1))))
+# Where pytesseract workers keep their scratch files (RAM-backed when available)
+OCR_TEMP_ROOT = os.getenv('OCR_TEMP_ROOT', '/dev/shm' if os.path.isdir('/dev/shm') else '')
+# Rasterization resolution for PDF pages
+OCR_PDF_DPI = int(os.getenv('OCR_PDF_DPI', '300'))
+# A PDF page's embedded text is used instead of OCR when it has at least this many letters/digits
+PDF_TEXT_MIN_CHARS = int(os.getenv('PDF_TEXT_MIN_CHARS', '20'))
+# Seconds allowed for pdftotext on one page
+PDF_TEXT_TIMEOUT = 30
+
+class OCRError(Exception):
+    """OCR failed in a worker (pytesseract's own errors do not survive pickling)"""
+
+class _OCREngine:
+    """Per-process OCR state: a warm tesserocr handle or a private scratch dir for pytesseract"""
+
+    def __init__(self):
+        self.api = None
+        self.scratch = None
+        if tesserocr is not None:
+            try:
+                self.api = tesserocr.PyTessBaseAPI()
+            except RuntimeError as e:
+                logger.warning(f"tesserocr unavailable, falling back to pytesseract: {str(e)}")
+        if self.api is None:
+            # Page and output files live in one directory per engine. The
+            # process-wide tempfile.tempdir is left alone: inline mode runs this
+            # engine in the web process, whose uploads must not land here.
+            self.scratch = tempfile.mkdtemp(prefix='ocr-worker-', dir=OCR_TEMP_ROOT or None)
+            Finalize(self, shutil.rmtree, args=(self.scratch, True), exitpriority=0)
+
+    def image_to_string(self, image: np.ndarray) -> str:
+        page = Image.fromarray(image)
+        if self.api is not None:
+            self.api.SetImage(page)
+            return self.api.GetUTF8Text()
+        return self._run_tesseract(page)
+
+    def _run_tesseract(self, page: Image.Image) -> str:
+        """What pytesseract.image_to_string does, but with files in this engine's scratch dir"""
+        fd, input_path = tempfile.mkstemp(prefix='page-', suffix='.png', dir=self.scratch)
+        os.close(fd)
+        output_base = input_path[:-len('.png')]
+        try:
+            page.save(input_path, format='PNG')
+            pytesseract.pytesseract.run_tesseract(input_path, output_base, 'txt', None)
+            with open(f"{output_base}.txt", 'rb') as output:
+                return output.read().decode('utf-8')
+        finally:
+            for path in (input_path, f"{output_base}.txt"):
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+_engine: Optional[_OCREngine] = None
+_engine_lock = threading.Lock()
+
+def init_ocr_worker():
+    """Pool initializer: start this process's OCR engine before the first page arrives"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = _OCREngine()
+
+def ocr_image(source: ImageSource) -> str:
+    """Decode, preprocess and OCR one image; runs inside an OCR worker"""
+    try:
+        if _engine is None:
+            init_ocr_worker()
+        binary = OCR_PIPELINE(source)
+        if _engine.api is not None:
+            # A tesserocr handle is not thread-safe (inline mode shares it across threads)
+            with _engine_lock:
+                return _engine.image_to_string(binary).strip()
+        return _engine.image_to_string(binary).strip()
+    except Exception as e:
+        raise OCRError(str(e)) from None
+
+class PageText(NamedTuple):
+    number: int
+    text: str
+    method: str  # 'text' for the PDF's embedded text layer, 'ocr' for render + Tesseract
+    seconds: float
+
+def native_page_text(pdf_path: str, page_number: int) -> str:
+    """The embedded text of one PDF page via poppler's pdftotext; empty if it has none"""
+    try:
+        completed = subprocess.run(
+            ['pdftotext', '-q', '-enc', 'UTF-8', '-f', str(page_number), '-l', str(page_number), pdf_path, '-'],
+            capture_output=True, timeout=PDF_TEXT_TIMEOUT
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"pdftotext failed on page {page_number}: {str(e)}")
+        return ''
+    return completed.stdout.decode('utf-8', errors='replace').strip() if completed.returncode == 0 else ''
+
+def ocr_pdf_page(pdf_path: str, page_number: int, dpi: int = OCR_PDF_DPI) -> PageText:
+    """Text of one PDF page (1-based): its text layer if usable, else rendered and OCRed.
+
+    Runs inside an OCR worker.
+    """
+    start = time.perf_counter()
+    text = native_page_text(pdf_path, page_number)
+    if sum(c.isalnum() for c in text) >= PDF_TEXT_MIN_CHARS:
+        return PageText(page_number, text, 'text', time.perf_counter() - start)
+
+    try:
+        pages = convert_from_path(pdf_path, dpi=dpi, first_page=page_number,
+                                  last_page=page_number, grayscale=True)
+    except Exception as e:
+        raise OCRError(f"Could not render page {page_number}: {str(e)}") from None
+    text = ocr_image(np.asarray(pages[0])) if pages else ''
+    return PageText(page_number, text, 'ocr', time.perf_counter() - start)
+
+class OCRPool:
+    """Long-lived worker processes that turn report images into text.
+
+    Callers hand over the encoded upload (or a path), so only compressed
+    bytes cross the process boundary; decoding, binarization and Tesseract
+    all run in the worker. Workers are spawned rather than forked because
+    the parent process runs TensorFlow threads. A spawned worker re-imports
+    the parent's main module (app.py, as ``__mp_main__``) along with its
+    imports (Flask, pandas, dotenv, the services package); only this
+    module's OpenCV/Tesseract code runs there, and app.py's
+    ``__mp_main__`` guard keeps workers from building services or
+    loading the TensorFlow models.
+    """
+
+    def __init__(self, processes: int = OCR_PROCESSES):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=init_ocr_worker
+                )
+            return self._executor
+
+    def submit(self, source: ImageSource) -> Future:
+        """Queue OCR of one image; the future resolves to its text"""
+        if self.processes <= 0:
+            future = Future()
+            try:
+                future.set_result(ocr_image(source))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        # Only the encoded bytes are pickled to the worker
+        if not isinstance(source, (str, os.PathLike, np.ndarray)):
+            source = bytes(read_buffer(source))
+        try:
+            return self._pool().submit(ocr_image, source)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool
+            self._reset()
+            return self._pool().submit(ocr_image, source)
+
+    def extract_text(self, source: ImageSource) -> str:
+        try:
+            return self.submit(source).result()
+        except BrokenProcessPool:
+            self._reset()
+            raise
+
+    def pdf_pages(self, source: ImageSource, dpi: int = OCR_PDF_DPI) -> Iterator[PageText]:
+        """Yield the text of each page of a PDF, in page order.
+
+        Pages with an embedded text layer are read directly; the rest are
+        rendered inside the workers one at a time, and at most two
+        pages per worker are in flight, so memory stays flat however long
+        the document is. Uploaded bytes are spilled to one temporary file
+        that poppler and every worker read.
+        """
+        spilled = None
+        if isinstance(source, (str, os.PathLike)):
+            pdf_path = os.fspath(source)
+        else:
+            spilled = tempfile.NamedTemporaryFile(prefix='report-', suffix='.pdf', dir=OCR_TEMP_ROOT or None,
+                                                  delete=False)
+            with spilled:
+                spilled.write(read_buffer(source))
+            pdf_path = spilled.name
+
+        try:
+            try:
+                page_count = pdfinfo_from_path(pdf_path)['Pages']
+            except Exception as e:
+                raise OCRError(f"Could not read PDF: {str(e)}") from None
+
+            if self.processes <= 0:
+                for page_number in range(1, page_count + 1):
+                    yield ocr_pdf_page(pdf_path, page_number, dpi)
+                return
+
+            pool = self._pool()
+            window = 2 * self.processes
+            in_flight = deque()
+            next_page = 1
+            try:
+                while in_flight or next_page <= page_count:
+                    while next_page <= page_count and len(in_flight) < window:
+                        in_flight.append(pool.submit(ocr_pdf_page, pdf_path, next_page, dpi))
+                        next_page += 1
+                    yield in_flight.popleft().result()
+            except BrokenProcessPool:
+                self._reset()
+                raise
+            finally:
+                # Abandoned early (error or consumer stopped): drop pages not yet started
+                for future in in_flight:
+                    future.cancel()
+        finally:
+            if spilled is not None:
+                os.unlink(pdf_path)
+
+    def _reset(self, wait: bool = False):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def shutdown(self):
+        """Stop the workers, letting them remove their scratch directories"""
+        self._reset(wait=True)
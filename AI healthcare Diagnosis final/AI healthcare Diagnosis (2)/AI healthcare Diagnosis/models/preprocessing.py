@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import cv2
+from models.image_io import ImageSource, decode_image
+
+logger = logging.getLogger(__name__)
+
+# fastNlMeansDenoising in the enhanced OCR pipeline dominates its cost, which
+# grows with pixel count: 0 disables it, 1 denoises at full resolution and
+# values in between denoise a copy downscaled by that factor
+OCR_DENOISE_SCALE = float(os.getenv('OCR_DENOISE_SCALE', '0.5'))
+
+# Network input size of the scan models (kept here so OCR workers need not import TensorFlow)
+SCAN_IMAGE_SIZE = (224, 224)
+
+# ImageNet statistics used by DenseNet's 'torch'-mode preprocess_input
+_IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# Structuring elements are immutable, so one instance serves every call
+_RECT_3X3 = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+_SQUARE_2X2 = np.ones((2, 2), np.uint8)
+
+Stage = Callable[[np.ndarray], np.ndarray]
+
+class _ThreadCLAHE(threading.local):
+    """One CLAHE object per thread: created once, but not safe to share across threads"""
+
+    def __init__(self, clip_limit: float, tile_grid_size: Tuple[int, int]):
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+
+def grayscale() -> Stage:
+    def stage(image):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    return stage
+
+def to_rgb() -> Stage:
+    def stage(image):
+        return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return stage
+
+def resize(size: Tuple[int, int]) -> Stage:
+    def stage(image):
+        return cv2.resize(image, size)
+    return stage
+
+def otsu_threshold() -> Stage:
+    def stage(image):
+        return cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+    return stage
+
+def adaptive_threshold(block_size: int = 11, c: int = 2) -> Stage:
+    def stage(image):
+        return cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, c)
+    return stage
+
+def denoise(scale: float = 1.0) -> Stage:
+    """Non-local means denoising, on a copy downscaled by ``scale`` when below 1"""
+    def stage(image):
+        if scale >= 1:
+            return cv2.fastNlMeansDenoising(image)
+        height, width = image.shape[:2]
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return cv2.resize(cv2.fastNlMeansDenoising(small), (width, height), interpolation=cv2.INTER_LINEAR)
+    return stage
+
+def clahe(clip_limit: float = 2.0, tile_grid_size: Tuple[int, int] = (8, 8)) -> Stage:
+    """Contrast-limited histogram equalization of a uint8 grayscale image"""
+    local = _ThreadCLAHE(clip_limit, tile_grid_size)
+    def stage(image):
+        return local.clahe.apply(image)
+    return stage
+
+def clahe_luminance(clip_limit: float = 3.0, tile_grid_size: Tuple[int, int] = (8, 8)) -> Stage:
+    """CLAHE on the L channel of a uint8 RGB image, leaving its colour untouched"""
+    local = _ThreadCLAHE(clip_limit, tile_grid_size)
+    def stage(image):
+        lab = cv2.cvtColor(image, cv2.COLOR_RGB2LAB)
+        lab[..., 0] = local.clahe.apply(np.ascontiguousarray(lab[..., 0]))
+        return cv2.cvtColor(lab, cv2.COLOR_LAB2RGB)
+    return stage
+
+def dilate(kernel: np.ndarray) -> Stage:
+    def stage(image):
+        return cv2.dilate(image, kernel, iterations=1)
+    return stage
+
+def scale_pixels() -> Stage:
+    """uint8 pixels to float32 in [0, 1]"""
+    def stage(image):
+        return image.astype(np.float32) / 255.0
+    return stage
+
+def imagenet_normalize() -> Stage:
+    """Same result as DenseNet's preprocess_input ('torch' mode) on uint8 RGB"""
+    def stage(image):
+        return (image.astype(np.float32) / 255.0 - _IMAGENET_MEAN) / _IMAGENET_STD
+    return stage
+
+def add_batch_axis() -> Stage:
+    def stage(image):
+        return image[np.newaxis]
+    return stage
+
+class PreprocessingPipeline:
+    """Decode an image and run it through named OpenCV/NumPy stages.
+
+    Stages are built once with their kernels and CLAHE objects, so a call
+    only does the pixel work. Already decoded arrays pass straight through
+    the decode step, letting one decoded upload feed several pipelines.
+    Each call can report its per-stage timings, and running totals are kept
+    for ``stats()``.
+    """
+
+    def __init__(self, name: str, stages: Sequence[Tuple[str, Stage]]):
+        self.name = name
+        self.stages: List[Tuple[str, Stage]] = list(stages)
+        self._totals: Dict[str, float] = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, source: ImageSource, timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Run every stage on the decoded source; per-stage milliseconds go into ``timings``"""
+        run_timings = {}
+        start = time.perf_counter()
+        image = decode_image(source)
+        run_timings['decode'] = time.perf_counter() - start
+
+        for stage_name, stage in self.stages:
+            start = time.perf_counter()
+            image = stage(image)
+            run_timings[stage_name] = time.perf_counter() - start
+
+        with self._lock:
+            self._calls += 1
+            for stage_name, seconds in run_timings.items():
+                self._totals[stage_name] = self._totals.get(stage_name, 0.0) + seconds
+        if timings is not None:
+            timings.update({stage_name: round(seconds * 1000, 2) for stage_name, seconds in run_timings.items()})
+        return image
+
+    def stats(self) -> Dict[str, float]:
+        """Average milliseconds per stage over every call so far"""
+        with self._lock:
+            calls = max(self._calls, 1)
+            return {stage_name: round(total * 1000 / calls, 2) for stage_name, total in self._totals.items()}
+
+def _ocr_enhanced_stages() -> List[Tuple[str, Stage]]:
+    stages = [('grayscale', grayscale()), ('threshold', adaptive_threshold())]
+    if OCR_DENOISE_SCALE > 0:
+        stages.append(('denoise', denoise(OCR_DENOISE_SCALE)))
+    return stages + [('clahe', clahe(2.0, (8, 8))), ('dilate', dilate(_SQUARE_2X2))]
+
+# Report OCR: Otsu binarization with strokes thickened for Tesseract
+OCR_PIPELINE = PreprocessingPipeline('ocr', [
+    ('grayscale', grayscale()),
+    ('threshold', otsu_threshold()),
+    ('dilate', dilate(_RECT_3X3))
+])
+
+# Noisier scans: adaptive threshold, optional denoise, contrast equalization
+OCR_ENHANCED_PIPELINE = PreprocessingPipeline('ocr_enhanced', _ocr_enhanced_stages())
+
+# Scan model input with pixels in [0, 1] (ImageAnalyzer, scan_analyzer)
+SCAN_PIPELINE = PreprocessingPipeline('scan', [
+    ('rgb', to_rgb()),
+    ('resize', resize(SCAN_IMAGE_SIZE)),
+    ('scale', scale_pixels()),
+    ('batch', add_batch_axis())
+])
+
+# Scan model input with luminance CLAHE and ImageNet normalization (scan_analysis)
+DENSENET_SCAN_PIPELINE = PreprocessingPipeline('densenet_scan', [
+    ('rgb', to_rgb()),
+    ('resize', resize(SCAN_IMAGE_SIZE)),
+    ('clahe', clahe_luminance(3.0, (8, 8))),
+    ('normalize', imagenet_normalize()),
+    ('batch', add_batch_axis())
+])
+
+# Indicator features: uint8 grayscale at the scan model's input size
+FEATURE_PIPELINE = PreprocessingPipeline('features', [
+    ('grayscale', grayscale()),
+    ('resize', resize(SCAN_IMAGE_SIZE))
+])
+
+def image_features(source: ImageSource) -> Dict:
+    """Intensity statistics and edges of an image, shared by all indicator checks.
+
+    Computed on the uint8 grayscale image at model input size, so intensities
+    are in 0-255 pixel units.
+    """
+    gray = FEATURE_PIPELINE(source)
+    mean, std = cv2.meanStdDev(gray)
+    edges = cv2.Canny(gray, 100, 200)
+    return {
+        'histogram': cv2.calcHist([gray], [0], None, [256], [0, 256]),
+        'mean_intensity': float(mean[0, 0]),
+        'std_intensity': float(std[0, 0]),
+        'edges': edges,
+        'max_edge': int(edges.max())
+    }
@@ -0,0 +1,70 @@
+import os
+import time
+import logging
+import threading
+from typing import Iterable
+import numpy as np
+import tensorflow as tf
+
+logger = logging.getLogger(__name__)
+
+# Set SCAN_MODEL_INT8=1 to serve scan models from their int8 TFLite export when one exists
+USE_INT8 = os.getenv('SCAN_MODEL_INT8', '0').lower() in ('1', 'true', 'yes')
+INT8_THREADS = int(os.getenv('SCAN_MODEL_INT8_THREADS', str(os.cpu_count() or 1)))
+
+def export_int8(model: tf.keras.Model, representative_images: Iterable[np.ndarray]) -> bytes:
+    """Full-integer post-training quantization of a Keras model to TFLite.
+
+    ``representative_images`` are preprocessed exactly as at serving time and
+    calibrate the activation ranges. Input and output stay float32, so the
+    interpreter is a drop-in replacement for the float model.
+    """
+    samples = [np.asarray(image, dtype=np.float32).reshape((-1,) + tuple(model.input_shape[1:])) for image in representative_images]
+    if not samples:
+        raise ValueError("At least one representative image is required for calibration")
+
+    def representative_dataset():
+        for batch in samples:
+            for image in batch:
+                yield [image[np.newaxis]]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+class QuantizedModel:
+    """Serve an int8 TFLite model with the same call signature as ServingModel.
+
+    The interpreter is resized only when the batch size changes. Calls are
+    serialized because a TFLite interpreter is not thread-safe; in practice a
+    single InferenceBatcher thread drives it.
+    """
+
+    def __init__(self, model_path: str, num_threads: int = INT8_THREADS):
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self._input = self.interpreter.get_input_details()[0]['index']
+        self._output = self.interpreter.get_output_details()[0]['index']
+        self._batch_size = None
+        self._lock = threading.Lock()
+
+    def __call__(self, images: np.ndarray) -> np.ndarray:
+        """Predict on a float32 batch of shape (N, 224, 224, 3)"""
+        images = np.ascontiguousarray(images, dtype=np.float32)
+        with self._lock:
+            if images.shape[0] != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input, images.shape, strict=True)
+                self.interpreter.allocate_tensors()
+                self._batch_size = images.shape[0]
+            self.interpreter.set_tensor(self._input, images)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output).copy()
+
+    def warm_up(self, batch_size: int = 1):
+        """Allocate tensors and run once before the first request"""
+        start = time.perf_counter()
+        shape = self.interpreter.get_input_details()[0]['shape'][1:]
+        self(np.zeros((batch_size,) + tuple(shape), dtype=np.float32))
+        logger.info(f"Warmed up int8 interpreter {os.path.basename(self.model_path)} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,103 @@
+import threading
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Process-wide home for heavy shared objects (datasets, Keras models, chatbot).
+
+    Each registered factory runs at most once; every caller receives the same
+    instance. Construction is serialized per name, so a factory may itself ask
+    the registry for other entries.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        """Register how to build a shared object"""
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.RLock())
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance, building it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name not in self._factories:
+                raise KeyError(f"No factory registered for '{name}'")
+            name_lock = self._locks[name]
+
+        with name_lock:
+            if name not in self._instances:
+                logger.info(f"Building shared instance: {name}")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+def _build_data_loader():
+    from .data_loader import DataLoader
+    return DataLoader()
+
+def _build_diagnosis_model():
+    from .diagnosis import DiagnosisModel
+    return DiagnosisModel(get_data_loader())
+
+def _build_scan_model():
+    from .scan_model import SharedScanModel
+    return SharedScanModel()
+
+def _build_ocr_pool():
+    from .ocr_pool import OCRPool
+    return OCRPool()
+
+def _build_image_analyzer():
+    from .image_analyzer import ImageAnalyzer
+    return ImageAnalyzer()
+
+def _build_scan_analyzer():
+    from .scan_analyzer import ScanAnalyzer
+    return ScanAnalyzer()
+
+def _build_chatbot():
+    from .chatbot_responses import MentalHealthChatbot
+    return MentalHealthChatbot()
+
+registry = ModelRegistry()
+registry.register('data_loader', _build_data_loader)
+registry.register('diagnosis_model', _build_diagnosis_model)
+registry.register('scan_model', _build_scan_model)
+registry.register('ocr_pool', _build_ocr_pool)
+registry.register('image_analyzer', _build_image_analyzer)
+registry.register('scan_analyzer', _build_scan_analyzer)
+registry.register('chatbot', _build_chatbot)
+
+def get_data_loader():
+    return registry.get('data_loader')
+
+def get_diagnosis_model():
+    return registry.get('diagnosis_model')
+
+def get_scan_model():
+    return registry.get('scan_model')
+
+def get_ocr_pool():
+    return registry.get('ocr_pool')
+
+def get_image_analyzer():
+    return registry.get('image_analyzer')
+
+def get_scan_analyzer():
+    return registry.get('scan_analyzer')
+
+def get_chatbot():
+    return registry.get('chatbot')
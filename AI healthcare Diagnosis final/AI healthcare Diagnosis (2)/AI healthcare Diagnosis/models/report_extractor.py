@@ -0,0 +1,178 @@
+import re
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Characters after a section header that are searched for that section's details
+SECTION_WINDOW = 500
+
+# Free-text value after a keyword: up to the next period, within one window
+_PHRASE = rf'[^.]{{0,{SECTION_WINDOW}}}'
+
+class _Rule(NamedTuple):
+    keyword: str                              # literal-initial regex for the trigger word
+    heads: Optional[str] = None               # section whose window this keyword opens
+    field: Optional[str] = None               # report field a match fills
+    name: Optional[str] = None                # detail pattern (keywords of one pattern share a name)
+    value: Optional[Tuple[str, str]] = None   # (separator, value) regexes following the keyword
+    whole: bool = False                       # report the keyword together with its value
+
+# Section details (diagnosis, medications, vitals, recommendations) only count
+# within SECTION_WINDOW characters after one of that section's headers; key
+# findings count anywhere. Where keywords share a prefix the longer comes first.
+_RULES = [
+    _Rule('diagnosis', heads='diagnosis', field='diagnosis', name='diagnosis', value=(r':?\s+', _PHRASE)),
+    _Rule('diagnosed with', field='diagnosis', name='diagnosed_with', value=(r'\s+', _PHRASE)),
+    _Rule('impression', heads='diagnosis', field='diagnosis', name='impression', value=(r':?\s+', _PHRASE)),
+    _Rule('assessment', heads='diagnosis'),
+    _Rule('medications', heads='medications'),
+    _Rule('drugs', heads='medications'),
+    _Rule('prescriptions', heads='medications'),
+    _Rule('prescribed', field='medications', name='prescribed', value=(r'\s+', _PHRASE), whole=True),
+    _Rule('taking', field='medications', name='taking', value=(r'\s+', _PHRASE), whole=True),
+    _Rule('vital signs', heads='vitals'),
+    _Rule('vitals', heads='vitals'),
+    _Rule('measurements', heads='vitals'),
+    _Rule('bp', field='vitals', name='blood_pressure', value=(r':?\s*', r'\d{2,3}/\d{2,3}')),
+    _Rule('heart rate', field='vitals', name='heart_rate', value=(r':?\s*', r'\d{2,3}')),
+    _Rule('pulse', field='vitals', name='heart_rate', value=(r':?\s*', r'\d{2,3}')),
+    _Rule('hr', field='vitals', name='heart_rate', value=(r':?\s*', r'\d{2,3}')),
+    _Rule('temperature', field='vitals', name='temperature', value=(r':?\s*', r'\d{2,3}(?:\.\d)?')),
+    _Rule('temp', field='vitals', name='temperature', value=(r':?\s*', r'\d{2,3}(?:\.\d)?')),
+    _Rule('spo2', field='vitals', name='oxygen', value=(r':?\s*', r'\d{2,3}%?')),
+    _Rule('oxygen', field='vitals', name='oxygen', value=(r':?\s*', r'\d{2,3}%?')),
+    _Rule('o2', field='vitals', name='oxygen', value=(r':?\s*', r'\d{2,3}%?')),
+    _Rule('recommendations', heads='recommendations'),
+    _Rule('plan', heads='recommendations'),
+    _Rule('recommend(?:ed|s)?', field='recommendations', name='recommend', value=(r'\s+', _PHRASE)),
+    _Rule('advised?', field='recommendations', name='advise', value=(r'\s+', _PHRASE)),
+    _Rule('follow-up', heads='recommendations', field='recommendations', name='follow_up',
+          value=(r':?\s+', _PHRASE)),
+    _Rule('follow up', field='recommendations', name='follow_up', value=(r':?\s+', _PHRASE)),
+    _Rule('findings?', field='key_findings', name='finding', value=(r':?\s+', _PHRASE)),
+    _Rule('noted', field='key_findings', name='noted', value=(r':?\s+', _PHRASE)),
+    _Rule('observed', field='key_findings', name='observed', value=(r':?\s+', _PHRASE)),
+    _Rule('shows', field='key_findings', name='shows', value=(r':?\s+', _PHRASE)),
+]
+
+def _compile_scanner():
+    """One alternation of every keyword, tagged by an empty group naming its rule.
+
+    Each branch starts with a literal so the regex engine skips positions that
+    cannot start a keyword; values are captured in lookaheads so keywords inside
+    a value are still found.
+    """
+    branches = []
+    for index, rule in enumerate(_RULES):
+        branch = f"{rule.keyword}(?P<k{index}>)"
+        if rule.value is not None:
+            separator, value = rule.value
+            lookahead = f"{separator}(?P<v{index}>{value})"
+            # A header opens its section even when no value follows it
+            branch += f"(?=(?:{lookahead})?)" if rule.heads else f"(?={lookahead})"
+        branches.append(branch)
+    return re.compile('|'.join(branches))
+
+_SCANNER = _compile_scanner()
+
+# Structured values (vitals readings), re-read when a window edge cuts through them
+_STRUCTURED_VALUES = {
+    index: re.compile(rule.value[1])
+    for index, rule in enumerate(_RULES)
+    if rule.value is not None and rule.value[1] != _PHRASE
+}
+
+# Detail patterns of each section, which start afresh in every window of that section
+_SECTION_PATTERNS = {
+    section: {rule.name for rule in _RULES if rule.field == section}
+    for section in ('diagnosis', 'medications', 'vitals', 'recommendations')
+}
+
+# Doses ("metformin 500 mg") start with any word, so they get their own pass
+_DOSE = re.compile(r'\b\w+\s+\d+\s*(?:mg|mcg|ml|g)')
+
+_SUMMARY_TERMS = re.compile(r'diagnosis|condition|treatment|symptoms|findings')
+
+def extract_report_info(text: str) -> Dict:
+    """Diagnoses, medications, vitals, recommendations and key findings in report text.
+
+    The text is lowercased once and scanned once for keywords (plus one pass
+    for medication doses), so cost is linear in its length however many
+    section headers it has. List fields keep the first occurrence of each
+    value, in text order.
+    """
+    lower = text.lower()
+    length = len(lower)
+    report_info = {
+        'diagnosis': [],
+        'medications': [],
+        'vitals': {},
+        'recommendations': [],
+        'key_findings': []
+    }
+    found = {field: {} for field in report_info if field != 'vitals'}
+    # Per section: end of the previous window, then start and end of the latest one
+    windows = {section: (-1, -1, -1) for section in _SECTION_PATTERNS}
+    medication_windows: List[int] = []
+    # Like separate finditer calls, a pattern's match hides its own keyword inside its value
+    consumed: Dict[str, int] = {}
+
+    for match in _SCANNER.finditer(lower):
+        index = int(match.lastgroup[1:])
+        rule = _RULES[index]
+        start = match.start()
+
+        value_start = match.start(f"v{index}") if rule.value is not None else -1
+        if value_start >= 0 and start >= consumed.get(rule.name, 0):
+            if rule.field == 'key_findings':
+                window_end = length
+            else:
+                previous_end, current_start, current_end = windows[rule.field]
+                if current_start <= start < current_end:
+                    window_end = current_end
+                elif start < previous_end and rule.field != 'vitals':
+                    # Only a keyword that is also the latest header starts before that header's window
+                    window_end = previous_end
+                else:
+                    window_end = -1
+
+            value_end = min(match.end(f"v{index}"), window_end)
+            if index in _STRUCTURED_VALUES and 0 <= value_end < match.end(f"v{index}"):
+                # A reading cut by the window edge is re-matched within the window:
+                # "101.2" cut after "101." reads as "101", a cut "120/80" not at all
+                clipped = _STRUCTURED_VALUES[index].match(lower, value_start, value_end)
+                value_end = clipped.end() if clipped else value_start
+            value = lower[start if rule.whole else value_start:value_end].strip()
+            if window_end >= 0 and lower[value_start:value_end].strip():
+                consumed[rule.name] = value_end
+                if rule.field == 'vitals':
+                    # The first reading in a window wins; a later window overrides it
+                    if rule.name not in report_info['vitals'] or report_info['vitals'][rule.name][1] < current_start:
+                        report_info['vitals'][rule.name] = (value, start)
+                else:
+                    found[rule.field].setdefault(value, start)
+
+        # Opened after the keyword's own value: a section's window starts past its header
+        if rule.heads is not None:
+            header_end = match.end()
+            windows[rule.heads] = (windows[rule.heads][2], header_end, header_end + SECTION_WINDOW)
+            for name in _SECTION_PATTERNS[rule.heads]:
+                consumed.pop(name, None)
+            if rule.heads == 'medications':
+                medication_windows.append(header_end)
+
+    for match in _DOSE.finditer(lower):
+        latest = bisect_right(medication_windows, match.start()) - 1
+        if latest >= 0 and match.end() <= medication_windows[latest] + SECTION_WINDOW:
+            found['medications'].setdefault(match.group().strip(), match.start())
+
+    for field, values in found.items():
+        report_info[field] = sorted(values, key=values.get)
+    report_info['vitals'] = {name: value for name, (value, _) in report_info['vitals'].items()}
+    return report_info
+
+def summary_sentences(text: str) -> List[str]:
+    """Sentences that mention a medical term, in order"""
+    return [
+        sentence.strip() for sentence in text.split('.')
+        if _SUMMARY_TERMS.search(sentence.lower())
+    ]
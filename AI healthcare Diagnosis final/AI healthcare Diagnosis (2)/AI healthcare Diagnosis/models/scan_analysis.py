@@ -4,15 +4,17 @@ import numpy as np
 from PIL import Image
 import tensorflow as tf
 from tensorflow.keras.models import load_model
-from tensorflow.keras.applications.densenet import DenseNet121, preprocess_input
-from tensorflow.keras.preprocessing.image import img_to_array
+from tensorflow.keras.applications.densenet import DenseNet121
 import cv2
-from models.image_analyzer import ImageAnalyzer
+import logging
+from models.registry import get_scan_model
+from models.image_io import decode_image
+from models.preprocessing import DENSENET_SCAN_PIPELINE, image_features
+
+logger = logging.getLogger(__name__)
 
 class ScanAnalyzer:
     def __init__(self):
-        self.image_analyzer = ImageAnalyzer()
-        self.model = self._load_model()
         self.scan_types = {
             'xray': {
                 'conditions': {
@@ -67,46 +69,25 @@ class ScanAnalyzer:
                 }
             }
         }
+        self._load_model()
 
     def _load_model(self):
+        # One head per scan type on the shared backbone, sized to that type's conditions
         try:
-            base_model = DenseNet121(
-                weights='imagenet',
-                include_top=False,
-                input_shape=(224, 224, 3)
-            )
-            
-            x = base_model.output
-            x = tf.keras.layers.GlobalAveragePooling2D()(x)
-            x = tf.keras.layers.Dense(1024, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.5)(x)
-            predictions = tf.keras.layers.Dense(4, activation='sigmoid')(x)
-            
-            model = tf.keras.Model(inputs=base_model.input, outputs=predictions)
-            return model
+            self.scan_model = get_scan_model()
+            self.heads = {
+                scan_type: self.scan_model.head(f"analysis_{scan_type}", list(details['conditions']))
+                for scan_type, details in self.scan_types.items()
+            }
         except Exception as e:
             raise Exception(f"Error loading model: {str(e)}")
 
     def preprocess_scan(self, image_path):
         try:
-            # Load and preprocess the image
-            img = Image.open(image_path).convert('RGB')
-            img = img.resize((224, 224))
-            img_array = img_to_array(img)
-            
-            # Apply CLAHE for better contrast
-            lab = cv2.cvtColor(img_array, cv2.COLOR_RGB2LAB)
-            l, a, b = cv2.split(lab)
-            clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-            cl = clahe.apply(l)
-            enhanced = cv2.merge((cl,a,b))
-            img_array = cv2.cvtColor(enhanced, cv2.COLOR_LAB2RGB)
-            
-            # Normalize and expand dimensions
-            img_array = preprocess_input(img_array)
-            img_array = np.expand_dims(img_array, axis=0)
-            
-            return img_array
+            # Decode the image (path, bytes or upload stream), resize, apply
+            # CLAHE to the uint8 luminance for better contrast, then normalize
+            # as DenseNet's preprocess_input does and add the batch dimension
+            return DENSENET_SCAN_PIPELINE(image_path)
         except Exception as e:
             raise Exception(f"Error preprocessing scan: {str(e)}")
 
@@ -119,11 +100,12 @@ class ScanAnalyzer:
                     'error': f'Unsupported scan type: {scan_type}. Supported types: {", ".join(self.scan_types.keys())}'
                 }
 
-            # Preprocess the scan
-            processed_image = self.preprocess_scan(image_path)
+            # Decode once; the decoded scan feeds the model preprocessing
+            image = decode_image(image_path)
+            processed_image = self.preprocess_scan(image)
             
             # Get model predictions
-            predictions = self.model.predict(processed_image)
+            predictions = self.heads[scan_type](self.scan_model.features(processed_image))
             
             # Process results
             results = {
@@ -137,6 +119,9 @@ class ScanAnalyzer:
                 'recommendations': []
             }
             
+            # Image features for indicator checks, extracted once on first detection
+            features = None
+
             # Analyze predictions for each condition
             conditions_found = False
             for idx, (condition, details) in enumerate(self.scan_types[scan_type]['conditions'].items()):
@@ -144,11 +129,13 @@ class ScanAnalyzer:
                 if confidence > 0.5:  # Detection threshold
                     conditions_found = True
                     severity = self._determine_severity(confidence)
+                    if features is None:
+                        features = self._extract_features(image)
                     results['findings']['detected_conditions'][condition] = {
                         'confidence': round(confidence * 100, 2),
                         'severity': severity,
                         'description': details['description'],
-                        'indicators': self._detect_indicators(processed_image, details['indicators'])
+                        'indicators': self._detect_indicators(features, details['indicators'])
                     }
                     
                     # Add detected abnormalities
@@ -187,48 +174,28 @@ class ScanAnalyzer:
         else:
             return 'mild'
 
-    def _detect_indicators(self, image, indicators):
-        detected = []
-        try:
-            # Extract features from the image
-            features = self._extract_features(image)
-            
-            for indicator in indicators:
-                if self._check_indicator(features, indicator):
-                    detected.append(indicator)
-            
-            return detected
-        except Exception:
-            return detected
+    def _detect_indicators(self, features, indicators):
+        if features is None:
+            return []
+        return [indicator for indicator in indicators if self._check_indicator(features, indicator)]
 
     def _extract_features(self, image):
+        # Grayscale, histogram, mean/std and edges of the decoded scan, shared by all indicator checks
         try:
-            # Convert to grayscale
-            if len(image.shape) > 3:
-                image = image[0]
-            gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-            
-            # Calculate various features
-            features = {
-                'mean_intensity': np.mean(gray),
-                'std_intensity': np.std(gray),
-                'histogram': cv2.calcHist([gray], [0], None, [256], [0, 256]),
-                'edges': cv2.Canny(np.uint8(gray * 255), 100, 200)
-            }
-            
-            return features
+            return image_features(image)
         except Exception as e:
-            print(f"Error extracting features: {str(e)}")
+            logger.warning(f"Error extracting features: {str(e)}")
             return None
 
     def _check_indicator(self, features, indicator):
+        # Intensities are uint8 pixel values, so fractions of the range are scaled by 255
         try:
             if 'opacity' in indicator.lower():
-                return features['mean_intensity'] > 0.6
+                return features['mean_intensity'] / 255.0 > 0.6
             elif 'nodule' in indicator.lower() or 'mass' in indicator.lower():
                 return np.sum(features['edges']) > 1000
             elif 'infiltrate' in indicator.lower():
-                return features['std_intensity'] > 0.2
+                return features['std_intensity'] / 255.0 > 0.2
             elif 'effusion' in indicator.lower():
                 hist = features['histogram']
                 dark_regions = np.sum(hist[:128]) / np.sum(hist)
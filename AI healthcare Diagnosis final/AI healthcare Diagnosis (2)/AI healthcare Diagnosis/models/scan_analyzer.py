@@ -6,38 +6,38 @@ import logging
 from typing import Dict, List, Tuple, Union
 import json
 import os
+from models.registry import get_scan_model
+from models.image_io import ImageSource
+from models.preprocessing import SCAN_PIPELINE, SCAN_IMAGE_SIZE
 
 logger = logging.getLogger(__name__)
 
 class ScanAnalyzer:
     def __init__(self):
-        self.model = None
+        self.scan_model = None
+        self.heads = {}
         self.labels = self._load_labels()
-        self.image_size = (224, 224)
+        self.image_size = SCAN_IMAGE_SIZE
         
-        # Initialize the model
+        # Use the shared backbone with one head per modality, sized from labels.json
         try:
-            self.model = tf.keras.applications.DenseNet121(
-                weights='imagenet',
-                include_top=False,
-                input_shape=(224, 224, 3)
-            )
-            
-            # Add classification layers
-            x = self.model.output
-            x = tf.keras.layers.GlobalAveragePooling2D()(x)
-            x = tf.keras.layers.Dense(1024, activation='relu')(x)
-            x = tf.keras.layers.Dropout(0.5)(x)
-            
-            # Create final layer with number of classes based on labels
-            total_conditions = sum(len(conditions) for conditions in self.labels.values())
-            self.predictions = tf.keras.layers.Dense(total_conditions, activation='sigmoid')(x)
-            
-            self.model = tf.keras.Model(inputs=self.model.input, outputs=self.predictions)
+            self.scan_model = get_scan_model()
+            self.heads = {
+                scan_type: self.scan_model.head(scan_type, conditions)
+                for scan_type, conditions in self.labels.items()
+            }
             
         except Exception as e:
             logger.error(f"Error initializing model: {str(e)}")
-            self.model = None
+            self.scan_model = None
+            self.heads = {}
+
+    def model_version(self, scan_type: str) -> str:
+        """Version of the backbone and head that analyze this scan type."""
+        head = self.heads.get(scan_type)
+        if self.scan_model is None or head is None:
+            return 'unavailable'
+        return f"{self.scan_model.version}/{head.version}"
 
     def _load_labels(self) -> Dict[str, List[str]]:
         """Load condition labels for different scan types."""
@@ -53,10 +53,10 @@ class ScanAnalyzer:
                 'ct': ['Normal', 'Abnormal']
             }
 
-    def analyze_scan(self, image_path: str, scan_type: str) -> Dict:
-        """Analyze a medical scan image and return findings."""
+    def analyze_scan(self, image_path: ImageSource, scan_type: str) -> Dict:
+        """Analyze a medical scan (path, bytes or upload stream) and return findings."""
         try:
-            if not os.path.exists(image_path):
+            if isinstance(image_path, (str, os.PathLike)) and not os.path.exists(image_path):
                 return {
                     'success': False,
                     'error': 'Image file not found'
@@ -77,7 +77,7 @@ class ScanAnalyzer:
                 }
 
             # Get predictions
-            predictions = self._get_predictions(image)
+            predictions = self._get_predictions(image, scan_type)
             if predictions is None:
                 return {
                     'success': False,
@@ -102,39 +102,24 @@ class ScanAnalyzer:
                 'error': str(e)
             }
 
-    def _load_and_preprocess_image(self, image_path: str) -> np.ndarray:
+    def _load_and_preprocess_image(self, image_path: ImageSource) -> np.ndarray:
         """Load and preprocess the image for analysis."""
         try:
-            # Read image
-            image = cv2.imread(image_path)
-            if image is None:
-                raise ValueError("Failed to load image")
-
-            # Convert to RGB
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            
-            # Resize
-            image = cv2.resize(image, self.image_size)
-            
-            # Normalize
-            image = image.astype(np.float32) / 255.0
-            
-            # Add batch dimension
-            image = np.expand_dims(image, axis=0)
-            
-            return image
+            # Decode (from disk or straight from memory), convert to RGB,
+            # resize, scale to [0, 1] and add the batch dimension
+            return SCAN_PIPELINE(image_path)
 
         except Exception as e:
             logger.error(f"Error preprocessing image: {str(e)}")
             return None
 
-    def _get_predictions(self, image: np.ndarray) -> np.ndarray:
-        """Get model predictions for the image."""
+    def _get_predictions(self, image: np.ndarray, scan_type: str) -> np.ndarray:
+        """Get the scan type's head predictions for the image."""
         try:
-            if self.model is None:
+            if self.scan_model is None or scan_type not in self.heads:
                 raise ValueError("Model not initialized")
             
-            predictions = self.model.predict(image)
+            predictions = self.heads[scan_type](self.scan_model.features(image))
             return predictions[0]  # Remove batch dimension
 
         except Exception as e:
@@ -0,0 +1,106 @@
+import threading
+import logging
+from typing import Dict, List, Sequence
+import numpy as np
+import tensorflow as tf
+from models.inference_batcher import InferenceBatcher
+from models.serving import ServingModel, IMAGE_SIZE
+from models.model_store import model_store
+from models.quantization import USE_INT8
+
+logger = logging.getLogger(__name__)
+
+# Bump when the backbone or the head architecture changes so stale artifacts are rebuilt
+BACKBONE_VERSION = 1
+HEAD_VERSION = 1
+FEATURE_DIM = 1024
+
+def _build_backbone() -> tf.keras.Model:
+    """DenseNet121 feature extractor: image -> pooled 1024-d feature vector"""
+    base_model = tf.keras.applications.DenseNet121(
+        weights='imagenet',
+        include_top=False,
+        input_shape=IMAGE_SIZE + (3,)
+    )
+    features = tf.keras.layers.GlobalAveragePooling2D()(base_model.output)
+    return tf.keras.Model(inputs=base_model.input, outputs=features, name='scan_backbone')
+
+def _build_head(num_labels: int) -> tf.keras.Model:
+    """Dense classifier on backbone features with one sigmoid output per label"""
+    inputs = tf.keras.Input(shape=(FEATURE_DIM,))
+    x = tf.keras.layers.Dense(1024, activation='relu')(inputs)
+    x = tf.keras.layers.Dropout(0.5)(x)
+    predictions = tf.keras.layers.Dense(num_labels, activation='sigmoid')(x)
+    return tf.keras.Model(inputs=inputs, outputs=predictions)
+
+class ScanHead:
+    """One task's classifier, evaluated in NumPy on pooled backbone features.
+
+    The head is two dense layers (dropout is a no-op at inference), so a
+    matrix product per layer is cheaper than another TensorFlow dispatch.
+    """
+
+    def __init__(self, name: str, labels: Sequence[str], model: tf.keras.Model, version: str = ''):
+        self.name = name
+        self.labels = list(labels)
+        self.model = model
+        self.version = version
+        dense_layers = [layer for layer in model.layers if isinstance(layer, tf.keras.layers.Dense)]
+        (self._w1, self._b1), (self._w2, self._b2) = [
+            (layer.kernel.numpy(), layer.bias.numpy()) for layer in dense_layers
+        ]
+
+    def __call__(self, features: np.ndarray) -> np.ndarray:
+        """Sigmoid scores of shape (N, len(labels)) for features of shape (N, 1024)"""
+        hidden = np.maximum(features @ self._w1 + self._b1, 0.0)
+        logits = hidden @ self._w2 + self._b2
+        return 1.0 / (1.0 + np.exp(-logits))
+
+class SharedScanModel:
+    """One DenseNet121 feature extractor shared by every scan analyzer.
+
+    The backbone runs once per image, through a single InferenceBatcher, so
+    requests from ImageAnalyzer and both ScanAnalyzers share forward passes.
+    Each analyzer or modality asks for its own head by name; only that head
+    is evaluated on the features. The backbone and every head are separate
+    ModelStore artifacts, so adding a modality never rebuilds the backbone.
+    """
+
+    def __init__(self, quantized: bool = USE_INT8):
+        self.backbone = None
+        self.manifest = None
+        self.serving = None
+        if quantized:
+            quantized_model = model_store.load_quantized('scan_backbone', BACKBONE_VERSION)
+            if quantized_model is not None:
+                self.serving, self.manifest = quantized_model
+        if self.serving is None:
+            self.backbone, self.manifest = model_store.load('scan_backbone', BACKBONE_VERSION, _build_backbone)
+            self.serving = ServingModel(self.backbone)
+
+        # Identifies the exact weights in use, e.g. for result cache keys
+        self.version = f"{BACKBONE_VERSION}-{self.manifest['created']}{'' if self.backbone is not None else '-int8'}"
+
+        # Serving path warmed up now; concurrent requests share batched forward passes
+        self.serving.warm_up()
+        self.batcher = InferenceBatcher(self.serving, name='scan-backbone')
+
+        self.heads: Dict[str, ScanHead] = {}
+        self._heads_lock = threading.Lock()
+
+    def head(self, name: str, labels: List[str]) -> ScanHead:
+        """Load (or build and save) the named head for the given labels"""
+        labels = list(labels)
+        with self._heads_lock:
+            head = self.heads.get(name)
+            if head is None or head.labels != labels:
+                model, manifest = model_store.load(
+                    f"head_{name}", HEAD_VERSION, lambda: _build_head(len(labels)),
+                    metadata={'labels': labels}
+                )
+                head = self.heads[name] = ScanHead(name, labels, model, f"{HEAD_VERSION}-{manifest['created']}")
+            return head
+
+    def features(self, images: np.ndarray) -> np.ndarray:
+        """Pooled backbone features for a preprocessed (N, 224, 224, 3) batch"""
+        return self.batcher.predict(images)
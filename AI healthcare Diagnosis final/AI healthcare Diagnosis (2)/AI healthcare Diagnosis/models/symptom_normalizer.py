@@ -0,0 +1,120 @@
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set
+
+_SEPARATORS = re.compile(r'[\s_]+')
+
+# Words that deny a symptom ("no fever", "denies itching"); such input must
+# never be matched to the symptom it negates
+_NEGATIONS = frozenset({'no', 'not', 'without', 'denies', 'denied', 'deny', 'never', 'none', 'absent'})
+
+def symptom_key(text: str) -> str:
+    """Lowercase and treat underscores and runs of whitespace as single spaces"""
+    return _SEPARATORS.sub(' ', text.lower()).strip()
+
+def _trigrams(key: str) -> Set[str]:
+    """Character trigrams of a key, padded so word boundaries count"""
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _is_negated(key: str) -> bool:
+    return any(token in _NEGATIONS or token.endswith("n't") for token in key.split(' '))
+
+def _covers(candidate: str, token: str) -> bool:
+    """Whether a vocabulary key shares at least one trigram (or, if shorter, the whole) of an input token"""
+    if len(token) < 3:
+        return token in candidate.split(' ')
+    return any(token[i:i + 3] in candidate for i in range(len(token) - 2))
+
+class SymptomNormalizer:
+    """Map free-text symptom strings to ids of a canonical symptom vocabulary.
+
+    Lookups try, in order: the exact lowercase/stripped name, the
+    underscore/space-insensitive key, the key with spaces removed, and finally
+    the closest vocabulary entry by trigram Dice similarity. A fuzzy match must
+    also share a trigram with every word of the input, and negated input
+    ("no fever", "denies itching") is never matched.
+    """
+
+    def __init__(self, vocabulary: List[str], min_similarity: float = 0.6, cache_size: int = 4096):
+        self.vocabulary = list(vocabulary)
+        self.min_similarity = min_similarity
+
+        self._exact: Dict[str, int] = {}
+        self._loose: Dict[str, int] = {}
+        self._compact: Dict[str, int] = {}
+        self._keys: List[str] = []
+        self._trigram_sizes: List[int] = []
+        self._trigram_index: Dict[str, List[int]] = defaultdict(list)
+
+        for symptom_id, name in enumerate(self.vocabulary):
+            key = symptom_key(name)
+            self._keys.append(key)
+            self._exact.setdefault(name.lower().strip(), symptom_id)
+            self._loose.setdefault(key, symptom_id)
+            self._compact.setdefault(key.replace(' ', ''), symptom_id)
+
+            grams = _trigrams(key)
+            self._trigram_sizes.append(len(grams))
+            for gram in grams:
+                self._trigram_index[gram].append(symptom_id)
+
+        self._trigram_index = dict(self._trigram_index)
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def _fuzzy_match(self, key: str) -> Optional[int]:
+        """Closest vocabulary entry sharing trigrams with the key"""
+        grams = _trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for symptom_id in self._trigram_index.get(gram, ()):
+                shared[symptom_id] += 1
+        if not shared:
+            return None
+
+        # Candidates in order of similarity; the best one covering every input word wins
+        tokens = key.split(' ')
+        ranked = sorted(
+            ((2.0 * common / (len(grams) + self._trigram_sizes[symptom_id]), symptom_id)
+             for symptom_id, common in shared.items()),
+            key=lambda candidate: (-candidate[0], candidate[1])
+        )
+        for score, symptom_id in ranked:
+            if score < self.min_similarity:
+                break
+            if all(_covers(self._keys[symptom_id], token) for token in tokens):
+                return symptom_id
+        return None
+
+    def _lookup(self, text: str) -> Optional[int]:
+        exact = self._exact.get(text.lower().strip())
+        if exact is not None:
+            return exact
+
+        key = symptom_key(text)
+        if not key or _is_negated(key):
+            return None
+        if key in self._loose:
+            return self._loose[key]
+        compact = key.replace(' ', '')
+        if compact in self._compact:
+            return self._compact[compact]
+        return self._fuzzy_match(key)
+
+    def canonical_id(self, text: str) -> Optional[int]:
+        """Vocabulary id for a raw symptom string, or None if nothing is close"""
+        if not isinstance(text, str):
+            return None
+        return self._cached_lookup(text)
+
+    def canonical_name(self, text: str) -> Optional[str]:
+        """Canonical vocabulary name for a raw symptom string"""
+        symptom_id = self.canonical_id(text)
+        return None if symptom_id is None else self.vocabulary[symptom_id]
+
+    def canonicalize(self, symptoms: Iterable[str]) -> List[int]:
+        """Sorted, de-duplicated vocabulary ids of the recognised symptoms"""
+        ids = {self.canonical_id(symptom) for symptom in symptoms}
+        ids.discard(None)
+        return sorted(ids)
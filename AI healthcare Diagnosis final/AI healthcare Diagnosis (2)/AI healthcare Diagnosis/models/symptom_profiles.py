@@ -0,0 +1,181 @@
+import heapq
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Tuple
+from .symptom_vocabulary import SymptomVocabulary, id_dtype
+
+# Number of set bits for every possible byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.int32)
+
+def normalize_symptom(text: str) -> str:
+    """Normalize a symptom name for matching"""
+    return text.lower().strip()
+
+class SymptomProfileIndex:
+    """Deduplicated row-level symptom profiles stored as packed bitsets.
+
+    Every distinct (disease, symptom set) row of the disease dataset becomes one
+    profile. Profiles are grouped by disease so per-disease aggregates can be
+    computed with ``reduceat`` over contiguous slices.
+    """
+
+    def __init__(self, diseases: List[str], vocabulary: List[str],
+                 profile_disease: np.ndarray, profile_bits: np.ndarray):
+        self.diseases = list(diseases)
+        self.symptoms = SymptomVocabulary(vocabulary)
+        self.vocabulary = self.symptoms.names
+        self.profile_disease = profile_disease
+        self.profile_bits = profile_bits
+        self.profile_sizes = _POPCOUNT[profile_bits].sum(axis=1)
+        self._profile_matrix = None
+
+        # Start offset and number of profiles for each disease
+        self.disease_offsets = np.searchsorted(profile_disease, np.arange(len(self.diseases)))
+        self.disease_profile_counts = np.bincount(profile_disease, minlength=len(self.diseases))
+
+        # Inverted index: profiles containing each symptom, in CSR layout
+        incidence = np.unpackbits(profile_bits, axis=1, count=len(self.vocabulary))
+        symptom_ids, profile_ids = np.nonzero(incidence.T)
+        self.postings = profile_ids.astype(id_dtype(len(profile_bits)))
+        self.postings_offsets = np.searchsorted(symptom_ids, np.arange(len(self.vocabulary) + 1))
+
+    @classmethod
+    def from_dataframe(cls, disease_data: pd.DataFrame) -> 'SymptomProfileIndex':
+        """Build the index from the raw disease dataset without a row loop"""
+        symptom_columns = [col for col in disease_data.columns if col.startswith('Symptom_')]
+        cells = disease_data[symptom_columns].to_numpy(dtype=object)
+        present = pd.notna(cells)
+
+        # Map every raw symptom string to a column of the normalized vocabulary
+        raw_symptoms = pd.unique(cells[present])
+        normalized = {raw: normalize_symptom(raw) for raw in raw_symptoms}
+        vocabulary = sorted(set(normalized.values()))
+        column_of = {symptom: idx for idx, symptom in enumerate(vocabulary)}
+        rows, cols = np.nonzero(present)
+        symptom_ids = np.fromiter((column_of[normalized[raw]] for raw in cells[rows, cols]),
+                                  dtype=np.int64, count=len(rows))
+
+        # Row x symptom incidence, packed to bitsets
+        incidence = np.zeros((len(cells), len(vocabulary)), dtype=bool)
+        incidence[rows, symptom_ids] = True
+        packed = np.packbits(incidence, axis=1)
+
+        disease_codes, diseases = pd.factorize(disease_data['Disease'])
+
+        # Deduplicate identical (disease, profile) rows, keeping dataset order
+        keyed = np.column_stack([disease_codes.astype(np.int64), packed.astype(np.int64)])
+        _, first_rows = np.unique(keyed, axis=0, return_index=True)
+        first_rows = np.sort(first_rows)
+        order = first_rows[np.argsort(disease_codes[first_rows], kind='stable')]
+
+        return cls(
+            diseases=diseases.tolist(),
+            vocabulary=vocabulary,
+            profile_disease=disease_codes[order].astype(np.int64),
+            profile_bits=packed[order]
+        )
+
+    def to_dict(self) -> Dict[str, object]:
+        """Constructor arguments, used to persist the index"""
+        return {
+            'diseases': self.diseases,
+            'vocabulary': self.vocabulary,
+            'profile_disease': self.profile_disease,
+            'profile_bits': self.profile_bits
+        }
+
+    def __len__(self) -> int:
+        return len(self.profile_bits)
+
+    def symptom_ids(self, symptoms: Iterable[str]) -> np.ndarray:
+        """Intern raw symptom strings to vocabulary ids"""
+        return self.symptoms.intern(symptoms)
+
+    def encode(self, symptom_ids: np.ndarray) -> np.ndarray:
+        """Encode symptom ids as a packed bitset over the vocabulary"""
+        incidence = np.zeros(len(self.vocabulary), dtype=bool)
+        incidence[symptom_ids] = True
+        return np.packbits(incidence)
+
+    def encode_batch(self, id_sets: List[np.ndarray]) -> np.ndarray:
+        """Encode several symptom id arrays as rows of a query x symptom matrix"""
+        queries = np.zeros((len(id_sets), len(self.vocabulary)))
+        rows = np.repeat(np.arange(len(id_sets)), [len(ids) for ids in id_sets])
+        columns = np.concatenate(id_sets) if id_sets else np.zeros(0, dtype=np.int64)
+        queries[rows, columns.astype(np.int64)] = 1.0
+        return queries
+
+    @property
+    def profile_matrix(self) -> np.ndarray:
+        """Dense profile x symptom matrix, unpacked on first batch request"""
+        if self._profile_matrix is None:
+            self._profile_matrix = np.unpackbits(
+                self.profile_bits, axis=1, count=len(self.vocabulary)
+            ).astype(np.float64)
+        return self._profile_matrix
+
+    def _normalize_scores(self, matching: np.ndarray) -> np.ndarray:
+        """Divide match counts by profile sizes, leaving empty profiles at 0"""
+        sizes = self.profile_sizes
+        return np.divide(matching, sizes, out=np.zeros(matching.shape), where=sizes > 0)
+
+    def score_profiles(self, query_bits: np.ndarray) -> np.ndarray:
+        """Fraction of each profile's symptoms present in the query"""
+        return self._normalize_scores(_POPCOUNT[self.profile_bits & query_bits].sum(axis=1))
+
+    def aggregate(self, profile_scores: np.ndarray, how: str = 'max') -> np.ndarray:
+        """Reduce profile scores (last axis) to one score per disease"""
+        if how == 'max':
+            return np.maximum.reduceat(profile_scores, self.disease_offsets, axis=-1)
+        if how == 'mean':
+            return np.add.reduceat(profile_scores, self.disease_offsets, axis=-1) / self.disease_profile_counts
+        raise ValueError(f"Unsupported aggregation: {how}")
+
+    def score_diseases(self, symptom_ids: np.ndarray, how: str = 'max') -> np.ndarray:
+        """Score every disease against the input symptom ids"""
+        return self.aggregate(self.score_profiles(self.encode(symptom_ids)), how)
+
+    def top_diseases(self, symptom_ids: np.ndarray, k: int, how: str = 'max') -> List[Tuple[str, float]]:
+        """Best k (disease, score) pairs, scoring only profiles that share a symptom"""
+        if len(symptom_ids) == 0 or k <= 0:
+            return []
+
+        # Count matches per profile from the postings of the input symptoms
+        offsets = self.postings_offsets
+        hits = np.concatenate([self.postings[offsets[i]:offsets[i + 1]] for i in symptom_ids])
+        candidates, matching = np.unique(hits, return_counts=True)
+        profile_scores = matching / self.profile_sizes[candidates]
+
+        # Candidates are ordered by profile, so each disease is a contiguous run
+        diseases, starts = np.unique(self.profile_disease[candidates], return_index=True)
+        if how == 'max':
+            scores = np.maximum.reduceat(profile_scores, starts)
+        elif how == 'mean':
+            scores = np.add.reduceat(profile_scores, starts) / self.disease_profile_counts[diseases]
+        else:
+            raise ValueError(f"Unsupported aggregation: {how}")
+
+        # Partial selection; ties keep dataset order
+        best = heapq.nlargest(k, range(len(diseases)), key=lambda i: (scores[i], -int(diseases[i])))
+        return [(self.diseases[diseases[i]], float(scores[i])) for i in best]
+
+    def score_diseases_batch(self, id_sets: List[np.ndarray], how: str = 'max') -> np.ndarray:
+        """Score every disease for each symptom id array with one matrix product"""
+        matching = self.encode_batch(id_sets) @ self.profile_matrix.T
+        return self.aggregate(self._normalize_scores(matching), how)
+
+    def disease_symptom_ids(self) -> Dict[str, np.ndarray]:
+        """Ids of all distinct symptoms seen in any profile of each disease"""
+        incidence = np.unpackbits(self.profile_bits, axis=1, count=len(self.vocabulary)).astype(bool)
+        per_disease = np.logical_or.reduceat(incidence, self.disease_offsets, axis=0)
+        return {
+            disease: np.flatnonzero(row).astype(self.symptoms.dtype)
+            for disease, row in zip(self.diseases, per_disease)
+        }
+
+    def disease_symptoms(self) -> Dict[str, List[str]]:
+        """Names of all distinct symptoms seen in any profile of each disease"""
+        return {
+            disease: self.symptoms.lookup(ids)
+            for disease, ids in self.disease_symptom_ids().items()
+        }
@@ -0,0 +1,27 @@
+import numpy as np
+from typing import Iterable, List
+from .symptom_normalizer import SymptomNormalizer
+
+def id_dtype(count: int) -> np.dtype:
+    """Smallest unsigned integer type able to hold ids 0..count-1"""
+    return np.dtype(np.uint16) if count <= np.iinfo(np.uint16).max + 1 else np.dtype(np.uint32)
+
+class SymptomVocabulary:
+    """Interns canonical symptom names to dense integer ids"""
+
+    def __init__(self, names: Iterable[str]):
+        self.names = tuple(names)
+        self.ids = {name: idx for idx, name in enumerate(self.names)}
+        self.dtype = id_dtype(len(self.names))
+        self.normalizer = SymptomNormalizer(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def intern(self, symptoms: Iterable[str]) -> np.ndarray:
+        """Sorted, de-duplicated ids of the recognised raw symptom strings"""
+        return np.array(self.normalizer.canonicalize(symptoms), dtype=self.dtype)
+
+    def lookup(self, ids: Iterable[int]) -> List[str]:
+        """Canonical names for a sequence of ids"""
+        return [self.names[idx] for idx in ids]
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# In-memory tier size, optional SQLite file for the on-disk tier, and its entry lifetime
+ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', '256'))
+ANALYSIS_CACHE_DB = os.getenv('ANALYSIS_CACHE_DB', '')
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', str(7 * 24 * 3600)))
+
+# Purge expired on-disk rows every this many writes
+_PURGE_EVERY = 100
+
+class AnalysisCacheService:
+    """Content-addressed cache of serialized scan/report analysis results.
+
+    Keys are the SHA-256 of the uploaded bytes together with the analysis
+    kind, scan type and model version, so a re-uploaded file is answered
+    without decoding or inference while a new model never serves stale
+    results. Entries are stored as ready-to-send JSON bytes in a bounded LRU
+    and, when ``db_path`` is set, in a SQLite table with TTL expiry that
+    survives restarts and is shared by worker processes.
+    """
+
+    def __init__(self, max_entries: int = ANALYSIS_CACHE_SIZE, db_path: str = ANALYSIS_CACHE_DB,
+                 ttl: int = ANALYSIS_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writes = 0
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path: str):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, payload BLOB NOT NULL, created REAL NOT NULL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS results_created ON results (created)')
+            self._purge_expired()
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache database unavailable, using memory only: {str(e)}")
+            self._db = None
+
+    @staticmethod
+    def key(data, *parts: Any) -> str:
+        """SHA-256 over the raw upload bytes and the parts that affect the result"""
+        digest = hashlib.sha256(data)
+        for part in parts:
+            digest.update(b'\0' + str(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return payload
+
+        payload = self._db_get(key)
+        if payload is not None:
+            self.stats['disk_hits'] += 1
+            self._remember(key, payload)
+            return payload
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, payload: bytes):
+        self._remember(key, payload)
+        self._db_put(key, payload)
+
+    def lookup(self, key: str, compute: Callable[[], Dict],
+               cacheable: Callable[[Dict], bool] = lambda result: True) -> Tuple[bytes, bool]:
+        """Return (JSON payload, cache hit), computing and storing the result on a miss"""
+        payload = self.get(key)
+        if payload is not None:
+            return payload, True
+        return self.store(key, compute(), cacheable), False
+
+    def store(self, key: str, result: Dict, cacheable: Callable[[Dict], bool] = lambda result: True) -> bytes:
+        """Serialize a freshly computed result, caching it if it qualifies"""
+        payload = json.dumps(result).encode('utf-8')
+        # Failures may be transient, so only successful analyses are kept
+        if cacheable(result):
+            self.put(key, payload)
+        return payload
+
+    def _remember(self, key: str, payload: bytes):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[bytes]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    'SELECT payload FROM results WHERE key = ? AND created >= ?', (key, time.time() - self.ttl)
+                ).fetchone()
+            return bytes(row[0]) if row else None
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache read failed: {str(e)}")
+            return None
+
+    def _db_put(self, key: str, payload: bytes):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO results (key, payload, created) VALUES (?, ?, ?)',
+                    (key, sqlite3.Binary(payload), time.time())
+                )
+                self._db.commit()
+                self._writes += 1
+            if self._writes % _PURGE_EVERY == 0:
+                self._purge_expired()
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache write failed: {str(e)}")
+
+    def _purge_expired(self):
+        with self._db_lock:
+            self._db.execute('DELETE FROM results WHERE created < ?', (time.time() - self.ttl,))
+            self._db.commit()
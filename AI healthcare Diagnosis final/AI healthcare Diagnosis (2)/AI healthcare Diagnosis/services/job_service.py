@@ -0,0 +1,163 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Jobs accepted but not yet finished; beyond this submissions are refused (HTTP 429)
+JOB_MAX_PENDING = int(os.getenv('JOB_MAX_PENDING', '32'))
+# Job threads; they mostly wait on the inference batcher or the OCR worker pool
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', str(max(4, os.cpu_count() or 1))))
+# How long finished jobs remain available for polling
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', '600'))
+
+class JobQueueFull(Exception):
+    """Raised when JOB_MAX_PENDING jobs are already queued or running"""
+
+class Job:
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.cache_hit = False
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ('completed', 'failed')
+
+    def update(self, **fields):
+        """Set fields and wake anyone waiting for a status change"""
+        with self.changed:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+    def wait(self, last_status: str, timeout: float) -> str:
+        """Block until the status differs from last_status or timeout expires"""
+        with self.changed:
+            self.changed.wait_for(lambda: self.status != last_status, timeout)
+            return self.status
+
+    def timings(self) -> Dict[str, Optional[float]]:
+        def ms(start, end):
+            return None if start is None or end is None else round((end - start) * 1000, 1)
+        return {
+            'queued_ms': ms(self.submitted, self.started),
+            'run_ms': ms(self.started, self.finished),
+            'total_ms': ms(self.submitted, self.finished)
+        }
+
+    def to_dict(self) -> Dict:
+        job = {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'cache_hit': self.cache_hit,
+            'timings': self.timings()
+        }
+        if self.status == 'completed':
+            job['result'] = self.result
+        elif self.status == 'failed':
+            job['error'] = self.error
+        return job
+
+class JobService:
+    """Run scan and report analyses off the request thread.
+
+    Jobs run on a thread pool that shares the in-process models. Scan
+    inference is batched by the shared backbone and report OCR is handed to
+    the OCR worker processes, so the threads mostly wait. At most
+    ``max_pending`` jobs may be queued or running at once, and finished jobs
+    are kept for ``result_ttl`` seconds.
+    """
+
+    def __init__(self, max_pending: int = JOB_MAX_PENDING, workers: int = JOB_WORKERS,
+                 result_ttl: int = JOB_RESULT_TTL):
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='analysis-job')
+        self._jobs: Dict[str, Job] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable, *args,
+               on_result: Optional[Callable[[Dict], None]] = None) -> Job:
+        """Queue fn(*args); raises JobQueueFull when the pending limit is reached.
+
+        ``on_result`` is called with the result of a successful job (e.g. to
+        populate a cache).
+        """
+        job = Job(kind)
+        with self._lock:
+            self._purge_expired()
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} analysis jobs are already pending")
+            self._pending += 1
+            self._jobs[job.id] = job
+
+        try:
+            future = self._threads.submit(self._run, job, fn, args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self._jobs.pop(job.id, None)
+            raise
+        future.add_done_callback(lambda f: self._finish(job, f, on_result))
+        return job
+
+    def completed(self, kind: str, result: Dict, cache_hit: bool = True) -> Job:
+        """Record a job whose result is already known, e.g. from the result cache"""
+        job = Job(kind)
+        job.started = job.finished = job.submitted
+        job.result = result
+        job.cache_hit = cache_hit
+        job.status = 'completed'
+        with self._lock:
+            self._purge_expired()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    @staticmethod
+    def _run(job: Job, fn: Callable, args: tuple):
+        job.update(status='running', started=time.time())
+        return fn(*args)
+
+    def _finish(self, job: Job, future: Future, on_result: Optional[Callable[[Dict], None]]):
+        with self._lock:
+            self._pending -= 1
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            job.update(status='failed', error=str(e), started=job.started or job.submitted, finished=time.time())
+            return
+
+        if on_result is not None:
+            try:
+                on_result(result)
+            except Exception as e:
+                logger.warning(f"Result hook for {job.kind} job {job.id} failed: {str(e)}")
+        job.update(status='completed', result=result, finished=time.time())
+        logger.info(f"{job.kind} job {job.id} completed: {job.timings()}")
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.result_ttl
+        expired = [job_id for job_id, job in self._jobs.items() if job.done and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,51 @@
+import re
+from bisect import bisect_left
+from typing import Iterable, List, Tuple
+from models.symptom_normalizer import symptom_key
+
+class SymptomSuggestService:
+    def __init__(self, symptoms: Iterable[str]):
+        """Build sorted prefix tables from the raw dataset symptom names"""
+        # Dataset tokens carry stray leading spaces; keep one entry per cleaned name
+        names = sorted({symptom.strip() for symptom in symptoms if symptom and symptom.strip()})
+
+        full_entries = []
+        word_entries = []
+        for name in names:
+            key = symptom_key(name)
+            full_entries.append((key, name))
+            # Also match from the start of every later word ("rash" -> "skin_rash")
+            for match in re.finditer(r' ', key):
+                word_entries.append((key[match.end():], name))
+
+        self._full_keys, self._full_names = self._split(sorted(full_entries))
+        self._word_keys, self._word_names = self._split(sorted(word_entries))
+
+    @staticmethod
+    def _split(entries: List[Tuple[str, str]]) -> Tuple[List[str], List[str]]:
+        return [key for key, _ in entries], [name for _, name in entries]
+
+    @staticmethod
+    def _prefix_matches(keys: List[str], names: List[str], prefix: str):
+        """Yield names whose key starts with prefix, using binary search"""
+        for idx in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[idx].startswith(prefix):
+                break
+            yield names[idx]
+
+    def suggest(self, query: str, limit: int = 10) -> List[str]:
+        """Symptoms matching the query prefix, whole-name matches first"""
+        prefix = symptom_key(query)
+        if not prefix or limit <= 0:
+            return []
+
+        suggestions = []
+        seen = set()
+        for keys, names in ((self._full_keys, self._full_names), (self._word_keys, self._word_names)):
+            for name in self._prefix_matches(keys, names, prefix):
+                if name not in seen:
+                    seen.add(name)
+                    suggestions.append(name)
+                    if len(suggestions) == limit:
+                        return suggestions
+        return suggestions
@@ -60,6 +60,30 @@ document.getElementById('addSymptom').addEventListener('click', () => {
     }
 });
 
+// Suggest matching symptoms from the server while typing
+let suggestTimer = null;
+document.getElementById('symptomInput').addEventListener('input', (e) => {
+    const query = e.target.value.trim();
+    clearTimeout(suggestTimer);
+    if (!query) return;
+
+    suggestTimer = setTimeout(async () => {
+        try {
+            const response = await fetch('/api/symptoms/suggest?' + new URLSearchParams({ q: query }));
+            const data = await response.json();
+            const datalist = document.getElementById('symptomSuggestions');
+            datalist.innerHTML = '';
+            (data.suggestions || []).forEach(suggestion => {
+                const option = document.createElement('option');
+                option.value = suggestion;
+                datalist.appendChild(option);
+            });
+        } catch (error) {
+            console.error('Error loading symptom suggestions:', error);
+        }
+    }, 150);
+});
+
 // Update the display of selected symptoms
 function updateSelectedSymptoms() {
     const container = document.getElementById('selectedSymptoms');
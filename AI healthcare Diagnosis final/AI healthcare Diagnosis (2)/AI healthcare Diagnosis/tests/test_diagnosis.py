@@ -0,0 +1,45 @@
+import os
+import pandas as pd
+import pytest
+from models.diagnosis import DiagnosisModel
+from models.symptom_profiles import SymptomProfileIndex
+
+DISEASE_DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'disease_dataset.csv')
+
+class StubDataLoader:
+    """Just the parts of DataLoader the diagnosis model uses"""
+
+    def __init__(self):
+        self.profiles = SymptomProfileIndex.from_dataframe(pd.read_csv(DISEASE_DATASET))
+
+    def get_profile_index(self):
+        return self.profiles
+
+    def get_disease_precautions(self, disease):
+        return []
+
+SYMPTOM_SETS = [
+    ['itching', 'skin_rash', 'nodal_skin_eruptions'],
+    ['high_fever', 'headache', 'vomiting'],
+    ['stomach ache', 'acidity'],
+]
+
+@pytest.fixture(scope='module')
+def model():
+    return DiagnosisModel(data_loader=StubDataLoader())
+
+@pytest.mark.parametrize('top_k', [0, -1, 1, 3, 100])
+def test_predict_and_predict_batch_agree(model, top_k):
+    batch = model.predict_batch(SYMPTOM_SETS, top_k=top_k, min_score=0.0)
+    assert batch == [model.predict(symptoms, top_k=top_k, min_score=0.0) for symptoms in SYMPTOM_SETS]
+
+def test_zero_top_k_finds_nothing(model):
+    expected = {"error": "No matching diseases found for the given symptoms"}
+    assert model.predict(SYMPTOM_SETS[0], top_k=0) == expected
+    assert model.predict_batch(SYMPTOM_SETS, top_k=0) == [expected] * len(SYMPTOM_SETS)
+
+def test_top_k_is_best_first(model):
+    scores = model.profiles.score_diseases(model.profiles.symptom_ids(SYMPTOM_SETS[1]))
+    assert model._top_k(scores, 0).size == 0
+    top = model._top_k(scores, 5)
+    assert list(scores[top]) == sorted(scores, reverse=True)[:5]
@@ -0,0 +1,51 @@
+from unittest import mock
+import pytest
+from models import image_analyzer
+from models.image_analyzer import ImageAnalyzer
+from models.ocr_pool import PageText
+from models.report_extractor import extract_report_info
+
+# A diagnosis, a finding and a vitals section that each cross a page break
+PAGES = [
+    "Patient seen in clinic. Chief complaint: cough and fever for five days.\n"
+    "Assessment\nDiagnosis: community acquired pneumonia",
+    "with pleural effusion. Chest X-ray findings: consolidation of the",
+    "right lower lobe. Vital signs\n"
+    "BP: 128/82, pulse 96, temp 38.4. Medications: amoxicillin 500 mg three times daily. "
+    "Plan: follow-up in two weeks with repeat imaging.",
+]
+
+class StubOCRPool:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def pdf_pages(self, source):
+        for number, text in enumerate(self.pages, start=1):
+            yield PageText(number, text, 'text', 0.0)
+
+@pytest.fixture
+def analyzer():
+    with mock.patch.object(ImageAnalyzer, '_load_model'):
+        return ImageAnalyzer()
+
+def analyze(analyzer, pages):
+    with mock.patch.object(image_analyzer, 'get_ocr_pool', return_value=StubOCRPool(pages)):
+        return analyzer._analyze_pdf_report(b'%PDF-1.4')
+
+def test_phrases_across_page_breaks_match_single_text(analyzer):
+    result = analyze(analyzer, PAGES)
+    report_info = dict(result['report_info'])
+    report_info.pop('summary')
+
+    assert report_info == extract_report_info('\n'.join(PAGES))
+    assert report_info['diagnosis'] == ['community acquired pneumonia\nwith pleural effusion']
+    assert 'consolidation of the\nright lower lobe' in report_info['key_findings']
+    assert result['pages'] == 3
+
+def test_empty_pages_are_skipped(analyzer):
+    result = analyze(analyzer, ['', PAGES[0], ''])
+    assert result['success'] and result['pages'] == 3
+    assert result['report_info']['diagnosis'] == ['community acquired pneumonia']
+
+def test_pdf_without_text_fails(analyzer):
+    assert analyze(analyzer, ['', ''])['success'] is False
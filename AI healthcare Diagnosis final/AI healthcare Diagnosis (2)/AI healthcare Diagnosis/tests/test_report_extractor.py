@@ -0,0 +1,31 @@
+import pytest
+from models.report_extractor import SECTION_WINDOW, extract_report_info
+
+def vitals_with_reading_ending_at(reading: str, offset: int) -> str:
+    """A vitals section whose reading ends ``offset`` characters after the window edge"""
+    header = 'vitals'
+    padding = SECTION_WINDOW - len(reading) + offset
+    return header + ' ' * padding + reading + ' and more text'
+
+@pytest.mark.parametrize('reading, offset, expected', [
+    ('temperature: 101.2', 0, {'temperature': '101.2'}),
+    ('temperature: 101.2', 1, {'temperature': '101'}),
+    ('temperature: 101.2', 2, {'temperature': '101'}),
+    ('temperature: 101.2', 3, {'temperature': '10'}),
+    ('temperature: 101.2', 4, {}),
+    ('bp: 120/80', 0, {'blood_pressure': '120/80'}),
+    ('bp: 120/80', 1, {}),
+    ('spo2: 97%', 1, {'oxygen': '97'}),
+    ('spo2: 97%', 2, {}),
+    ('pulse: 102', 1, {'heart_rate': '10'}),
+])
+def test_vitals_cut_by_window_edge(reading, offset, expected):
+    assert extract_report_info(vitals_with_reading_ending_at(reading, offset))['vitals'] == expected
+
+def test_vitals_outside_any_window_are_ignored():
+    assert extract_report_info('temperature: 101.2. bp 120/80')['vitals'] == {}
+
+def test_free_text_is_clamped_to_window():
+    # The window after "diagnosis" ends eight characters into the impression
+    text = 'diagnosis' + ' ' * (SECTION_WINDOW - 20) + 'impression: acute bronchitis'
+    assert extract_report_info(text)['diagnosis'] == ['acute br']
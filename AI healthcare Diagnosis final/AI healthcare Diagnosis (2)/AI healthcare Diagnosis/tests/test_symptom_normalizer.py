@@ -0,0 +1,44 @@
+import os
+import pandas as pd
+import pytest
+from models.symptom_profiles import SymptomProfileIndex
+
+DISEASE_DATASET = os.path.join(os.path.dirname(__file__), '..', 'data', 'datasets', 'disease_dataset.csv')
+
+@pytest.fixture(scope='module')
+def normalizer():
+    # The shipped vocabulary, so near misses are judged against every real symptom
+    return SymptomProfileIndex.from_dataframe(pd.read_csv(DISEASE_DATASET)).symptoms.normalizer
+
+@pytest.mark.parametrize('text, expected', [
+    ('itching', 'itching'),
+    ('  Skin_Rash ', 'skin_rash'),
+    ('skin rash', 'skin_rash'),
+    ('skinrash', 'skin_rash'),
+    ('headach', 'headache'),
+    ('vomitting', 'vomiting'),
+    ('stomach ache', 'stomach_pain'),
+    ('high fevr', 'high_fever'),
+])
+def test_resolves(normalizer, text, expected):
+    assert normalizer.canonical_name(text) == expected
+
+@pytest.mark.parametrize('text', [
+    'not itching',
+    'no headache',
+    'without vomiting',
+    'denies skin rash',
+    'Denied high_fever',
+    "doesn't have fever",
+])
+def test_negated_symptoms_do_not_resolve(normalizer, text):
+    assert normalizer.canonical_name(text) is None
+
+@pytest.mark.parametrize('text', ['', '   ', 'pain', 'feeling great today'])
+def test_unrelated_input_does_not_resolve(normalizer, text):
+    assert normalizer.canonical_name(text) is None
+
+def test_canonicalize_drops_negated_and_unknown(normalizer):
+    names = normalizer.vocabulary
+    ids = normalizer.canonicalize(['headach', 'no itching', 'Headache', 'feeling great today'])
+    assert [names[symptom_id] for symptom_id in ids] == ['headache']
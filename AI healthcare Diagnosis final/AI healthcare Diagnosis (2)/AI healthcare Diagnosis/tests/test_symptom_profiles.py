@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from models.symptom_profiles import SymptomProfileIndex, normalize_symptom
+
+# Diseases interleaved, a duplicate row, a row padded with NaN and raw names
+# with stray whitespace and capitals, as in the shipped dataset
+ROWS = [
+    ('Flu', ['fever', 'cough', 'headache']),
+    ('Allergy', ['itching', ' skin_rash']),
+    ('Flu', ['fever', 'chills']),
+    ('Migraine', ['headache', 'nausea', 'Blurred_vision ']),
+    ('Flu', ['fever', 'cough', 'headache']),
+    ('Allergy', ['itching', 'sneezing', 'skin_rash']),
+    ('Migraine', ['headache']),
+    ('Gastritis', ['nausea', 'stomach_pain', 'vomiting', 'fever']),
+]
+
+QUERIES = [
+    [],
+    ['fever'],
+    ['headache', 'nausea'],
+    ['itching', 'skin_rash', 'sneezing'],
+    ['fever', 'cough', 'chills', 'vomiting'],
+    ['blurred_vision'],
+    ['unknown_symptom'],
+]
+
+@pytest.fixture(scope='module')
+def index():
+    width = max(len(symptoms) for _, symptoms in ROWS)
+    frame = pd.DataFrame(
+        [[disease] + symptoms + [np.nan] * (width - len(symptoms)) for disease, symptoms in ROWS],
+        columns=['Disease'] + [f'Symptom_{i + 1}' for i in range(width)]
+    )
+    return SymptomProfileIndex.from_dataframe(frame)
+
+def brute_force_max(query):
+    """Best fraction of any dataset row's symptoms present in the query, per disease"""
+    query = {normalize_symptom(symptom) for symptom in query}
+    scores = {}
+    for disease, symptoms in ROWS:
+        row = {normalize_symptom(symptom) for symptom in symptoms}
+        scores[disease] = max(scores.get(disease, 0.0), len(row & query) / len(row))
+    return scores
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_score_diseases_matches_brute_force(index, query):
+    expected = brute_force_max(query)
+    scores = index.score_diseases(index.symptom_ids(query))
+    assert dict(zip(index.diseases, scores.tolist())) == pytest.approx(expected)
+
+def test_score_diseases_batch_matches_brute_force(index):
+    scores = index.score_diseases_batch([index.symptom_ids(query) for query in QUERIES])
+    for query, row in zip(QUERIES, scores):
+        assert dict(zip(index.diseases, row.tolist())) == pytest.approx(brute_force_max(query))
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_top_diseases_matches_brute_force(index, query):
+    expected = {disease: score for disease, score in brute_force_max(query).items() if score > 0}
+    top = index.top_diseases(index.symptom_ids(query), k=len(index.diseases))
+    assert dict(top) == pytest.approx(expected)
+    assert [score for _, score in top] == sorted(expected.values(), reverse=True)
+
+def test_duplicate_rows_are_one_profile(index):
+    assert len(index) == len(ROWS) - 1